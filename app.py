@@ -1,7 +1,9 @@
 # app.py
 
+import hmac
+import json
 import os
-from flask import Flask, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from twilio.twiml.messaging_response import MessagingResponse
 
 # --- VAJRA Integration ---
@@ -10,6 +12,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 try:
     from cli_agent import VajraCLI
+    from whatsapp import welcome_reply
+    from reply_queue import DeferredReplyQueue, RecordingTwilioClient
+    from metrics import METRICS
 except ImportError as e:
     print(f"❌ Critical Error: Could not import VajraCLI. Make sure backend path is correct.")
     print(f"Error details: {e}")
@@ -19,13 +24,42 @@ except ImportError as e:
 app = Flask(__name__)
 
 # --- Load VAJRA Agent ONCE ---
+# Under `gunicorn -c gunicorn.conf.py` (preload) this runs once in the master
+# and every worker inherits the loaded agent copy-on-write.
 print("🚀 Initializing VAJRA Agent... This may take a moment.")
-backend_dir = os.path.join(os.path.dirname(__file__), 'backend')
-os.chdir(backend_dir)
 vajra_agent = VajraCLI()
-os.chdir('..')
 print("✅ VAJRA Agent is ready and online.")
 
+# --- Deferred replies ---
+# Acknowledge the webhook at once and send the answer through the Twilio REST
+# API, so slow Gemini responses never hit Twilio's ~15s webhook timeout.
+def start_reply_queue():
+    """Deferred reply queue with its own Twilio client, or None when disabled"""
+    if os.getenv("VAJRA_DEFERRED_REPLIES") != "1":
+        return None
+    if os.getenv("VAJRA_TWILIO_FAKE") == "1":
+        twilio_client = RecordingTwilioClient()
+    else:
+        from twilio.rest import Client
+        twilio_client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+    print("📨 Deferred reply mode enabled.")
+    return DeferredReplyQueue(
+        vajra_agent.generate_response,
+        twilio_client,
+        max_depth=int(os.getenv("VAJRA_REPLY_QUEUE_DEPTH", "100")),
+        workers=int(os.getenv("VAJRA_REPLY_WORKERS", "4"))
+    )
+
+
+def restart_reply_queue():
+    """Worker threads and HTTP sessions do not survive a fork - give each worker its own
+    (called by gunicorn.conf.py's post_fork)"""
+    global reply_queue
+    reply_queue = start_reply_queue()
+
+
+reply_queue = start_reply_queue()
+
 
 # --- Webhook for Twilio ---
 @app.route("/whatsapp", methods=['POST'])
@@ -36,17 +70,81 @@ def whatsapp_reply():
 
     resp = MessagingResponse()
 
-    if not incoming_msg or incoming_msg.lower() in ['hi', 'hello', 'start']:
-        reply_text = (
-            "Welcome to VAJRA, your AI legal assistant for BNS, BSA, and BNSS.\n\n"
-            "Ask me a question like:\n"
-            "-> What is the punishment for theft?\n"
-            "-> What are the rights during an arrest?"
-        )
-    else:
+    reply_text = welcome_reply(incoming_msg)
+    sender = request.values.get('From') or None
+    # A deferred reply goes to From - without one, answer in the webhook response
+    if reply_text is None and reply_queue is not None and sender is not None:
+        if reply_queue.submit(sender, request.values.get('To', ''), incoming_msg):
+            print("📨 Queued for deferred reply.")
+            return str(resp)
+        reply_text = "VAJRA is handling a lot of questions right now. Please try again in a minute."
+    elif reply_text is None:
         print("🤖 Generating response from VAJRA...")
-        reply_text = vajra_agent.generate_response(incoming_msg)
+        reply_text = vajra_agent.generate_response(incoming_msg, sender)
         print("✉️ Sending response.")
 
-    resp.message(reply_text)
-    return str(resp)
\ No newline at end of file
+    with METRICS.stage("twiml"):
+        resp.message(reply_text)
+        body = str(resp)
+    return body
+
+
+# --- Streaming answers for web clients ---
+def sse_event(data, event=None):
+    """One server-sent event; JSON data keeps newlines in the answer intact"""
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route("/stream", methods=['GET', 'POST'])
+def stream_answer():
+    """Server-sent events: one `data: {"text": ...}` event per generated chunk, then `event: done`."""
+    question = (request.values.get('q') or (request.get_json(silent=True) or {}).get('question') or '').strip()
+    if not question:
+        return jsonify({"error": "Ask a question with ?q=... or a JSON body {\"question\": ...}"}), 400
+    print(f"💬 Streaming answer for: '{question}'")
+
+    def events():
+        for chunk in vajra_agent.stream_response(question):
+            yield sse_event({"text": chunk})
+        yield sse_event({}, event="done")
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        # Stop proxies (nginx, Heroku router) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics for this worker process"""
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+def admin_authorized():
+    """Admin endpoints need VAJRA_ADMIN_TOKEN set and sent as a bearer token"""
+    token = os.getenv("VAJRA_ADMIN_TOKEN")
+    return bool(token) and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+@app.route("/admin/reload", methods=['POST'])
+def reload_corpus():
+    """Load the corpus files again and swap them in; answers in flight finish on the old version.
+    Reloads only the worker that serves this request - the VAJRA_RELOAD_INTERVAL watcher covers them all."""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        corpus = vajra_agent.reload_data()
+    except Exception as e:
+        return jsonify({"error": str(e), "version": vajra_agent.state.version}), 409
+    return jsonify(corpus.summary())
+
+
+@app.route("/queue", methods=['GET'])
+def queue_stats():
+    """Deferred reply queue depth and latency metrics"""
+    if reply_queue is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(enabled=True, **reply_queue.stats()))
@@ -0,0 +1,130 @@
+# asgi.py
+#
+# Async WhatsApp webhook. One process keeps many conversations in flight:
+# embedding and Gemini calls are awaited, FAISS searches run on a thread pool.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000
+#   gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+import asyncio
+import hmac
+import json
+import os
+import sys
+from urllib.parse import parse_qs
+
+from twilio.twiml.messaging_response import MessagingResponse
+
+# --- VAJRA Integration ---
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+try:
+    from cli_agent import VajraCLI
+    from whatsapp import welcome_reply
+    from metrics import METRICS
+except ImportError as e:
+    print(f"❌ Critical Error: Could not import VajraCLI. Make sure backend path is correct.")
+    print(f"Error details: {e}")
+    sys.exit(1)
+
+# --- Load VAJRA Agent ONCE ---
+print("🚀 Initializing VAJRA Agent... This may take a moment.")
+vajra_agent = VajraCLI()
+print("✅ VAJRA Agent is ready and online.")
+
+
+async def read_body(receive):
+    """Collect the full HTTP request body from the ASGI receive channel"""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def send_response(send, status, body, content_type="text/plain; charset=utf-8"):
+    body = body.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+# --- Webhook for Twilio ---
+async def whatsapp_reply(scope, receive, send):
+    """Receives incoming messages from Twilio and replies."""
+    # Same lookup as Flask's request.values: query string, then form body
+    values = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+    values.update(parse_qs((await read_body(receive)).decode("utf-8")))
+    incoming_msg = values.get('Body', [''])[0].strip()
+    print(f"💬 Received message: '{incoming_msg}'")
+
+    resp = MessagingResponse()
+
+    reply_text = welcome_reply(incoming_msg)
+    if reply_text is None:
+        # Twilio's From identifies the conversation for follow-up questions
+        sender = values.get('From', [''])[0] or None
+        reply_text = await vajra_agent.agenerate_response(incoming_msg, sender)
+
+    with METRICS.stage("twiml"):
+        resp.message(reply_text)
+        body = str(resp)
+    await send_response(send, 200, body, "application/xml")
+
+
+async def metrics(scope, receive, send):
+    """Prometheus text-format metrics for this worker process"""
+    await send_response(send, 200, METRICS.render(), "text/plain; version=0.0.4")
+
+
+async def reload_corpus(scope, receive, send):
+    """Reload the corpus files off the event loop and swap them in (needs VAJRA_ADMIN_TOKEN)"""
+    token = os.getenv("VAJRA_ADMIN_TOKEN")
+    authorization = dict(scope.get("headers", [])).get(b"authorization", b"").decode("latin-1")
+    if not token or not hmac.compare_digest(authorization, f"Bearer {token}"):
+        await send_response(send, 403, json.dumps({"error": "Forbidden"}), "application/json")
+        return
+    try:
+        corpus = await asyncio.to_thread(vajra_agent.reload_data)
+    except Exception as e:
+        body = {"error": str(e), "version": vajra_agent.state.version}
+        await send_response(send, 409, json.dumps(body), "application/json")
+        return
+    await send_response(send, 200, json.dumps(corpus.summary()), "application/json")
+
+
+ROUTES = {
+    ("POST", "/whatsapp"): whatsapp_reply,
+    ("GET", "/metrics"): metrics,
+    ("POST", "/admin/reload"): reload_corpus,
+}
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                vajra_agent.search_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await send_response(send, 404, "Not Found")
+        return
+    await handler(scope, receive, send)
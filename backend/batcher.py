@@ -0,0 +1,123 @@
+"""
+VAJRA Retrieval Batcher
+Micro-batches concurrent retrievals: questions arriving within a short
+window are embedded in one API call and searched with one FAISS call per
+index on the stacked query matrix, then handed back to their callers
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import BATCH_BUCKETS, METRICS
+
+
+class RetrievalBatcher:
+    """Coalesces concurrent (query, k) retrievals into batched embed + search calls.
+
+    embed_batch(texts) -> list of embeddings; if it raises, every caller in the batch gets the error
+    search_batch(matrix, k) -> list of result lists, one per matrix row
+    scope() -> what the search depends on, read on the submitting thread (e.g.
+    the corpus version it is pinned to); only retrievals with the same scope
+    share a search, which runs in the contextvars context of the first of them
+
+    A collector thread forms the batches and hands them to a small pool, so
+    the next batch fills while earlier ones wait on the embedding API.
+    """
+
+    def __init__(self, embed_batch, search_batch, max_batch=16, window_ms=5.0, workers=4, scope=None):
+        self.embed_batch = embed_batch
+        self.search_batch = search_batch
+        self.scope = scope or (lambda: None)
+        self.max_batch = max(1, max_batch)
+        self.window = window_ms / 1000.0
+        self.workers = max(1, workers)
+
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vajra-batch")
+        self._thread = threading.Thread(target=self._loop, name="vajra-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, query, k):
+        """Future resolving to (query embedding or None, results)"""
+        future = Future()
+        self._queue.put((query, k, future, self.scope(), contextvars.copy_context()))
+        return future
+
+    def retrieve(self, query, k):
+        """Blocking submit: (query embedding or None, results)"""
+        return self.submit(query, k).result()
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # The first query opens the window; whatever arrives before it closes rides along
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)
+                    break
+                batch.append(job)
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch):
+        with self._lock:
+            self.batches += 1
+            self.queries += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+        METRICS.observe("vajra_batch_size", len(batch), buckets=BATCH_BUCKETS)
+
+        try:
+            # Identical questions in one batch share a single embedding
+            texts = list(dict.fromkeys(query for query, *_ in batch))
+            embeddings = dict(zip(texts, self.embed_batch(texts)))
+
+            # One search per distinct (k, scope) over every row that has an embedding
+            groups = {}
+            for query, k, future, scope, context in batch:
+                if embeddings[query] is None:
+                    future.set_result((None, []))
+                else:
+                    groups.setdefault((k, scope), (context, []))[1].append((query, future))
+            for (k, _), (context, jobs) in groups.items():
+                matrix = np.vstack([embeddings[query] for query, _ in jobs])
+                for (query, future), results in zip(jobs, context.run(self.search_batch, matrix, k)):
+                    future.set_result((embeddings[query], results))
+        except Exception as e:
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "queries": self.queries,
+                "mean_batch": self.queries / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "max_batch": self.max_batch,
+                "window_ms": self.window * 1000.0,
+                "workers": self.workers,
+            }
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._pool.shutdown(wait=False)
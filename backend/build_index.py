@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+VAJRA Index Builder
+Embeds every registered corpus (BNS, BSA, BNSS, ...) and writes its FAISS index.
+
+Sections are embedded in batches, several batches at a time, under a rate
+limit with retries. Finished embeddings are checkpointed per corpus, keyed on
+a hash of the embedded text, so an interrupted build resumes where it stopped
+and a rebuild only re-embeds sections whose title/description changed.
+
+The index type (exact L2/cosine, scalar or product quantized, HNSW, IVF)
+is chosen with --index-type and recorded in each index's JSON sidecar,
+together with the embedder and dimension - the agent refuses to query an
+index with a different embedding model.
+
+Usage:
+    python build_index.py                    # every corpus
+    python build_index.py --acts BNS BSA     # selected corpora
+    python build_index.py --index-type hnsw  # compressed / approximate index
+    python build_index.py --embedder fake --out-dir /tmp/vajra-index   # offline
+    python build_index.py --embedder local --model BAAI/bge-small-en-v1.5 --threads 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import faiss
+import numpy as np
+
+from corpora import (CORPORA, DATA_DIR, data_path, index_path,
+                     read_index_meta, unified_ids_path, unified_index_path)
+from embedders import EMBEDDERS, get_embedder
+from index_factory import DEFAULT_INDEX_TYPE, INDEX_TYPES, index_metric, make_index
+from llm_client import LLMClient, is_transient
+from resilience import CallPolicy, CircuitBreaker
+from snapshot import compile_snapshot
+
+
+def section_text(entry):
+    """The text that gets embedded for a section"""
+    return f"{entry['section_title']}: {entry['description']}"
+
+
+def text_hash(embedder_name, text):
+    return hashlib.sha1(f"{embedder_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def checkpoint_path(prefix, out_dir):
+    return os.path.join(out_dir, "embeddings", f"{prefix}_embeddings.npz")
+
+
+def load_checkpoint(path):
+    """hash -> embedding for everything embedded by earlier (possibly partial) runs"""
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return dict(zip(data["hashes"].tolist(), data["vectors"]))
+
+
+def save_checkpoint(path, done):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    hashes = list(done)
+    vectors = np.vstack([done[h] for h in hashes]) if hashes else np.zeros((0, 0), dtype="float32")
+    np.savez(tmp_path, hashes=np.array(hashes), vectors=vectors)
+    os.replace(tmp_path, path)
+
+
+def write_index(index, path, meta):
+    """Atomically write an index plus its JSON sidecar"""
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_entries(prefix, args):
+    with open(data_path(prefix, args.data_dir), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def existing_vectors(act, prefix, embedder, args):
+    """Vectors of a corpus that is not being rebuilt: from its checkpoint, else its flat index"""
+    entries = load_entries(prefix, args)
+    done = load_checkpoint(checkpoint_path(prefix, args.out_dir))
+    hashes = [text_hash(embedder.name, section_text(entry)) for entry in entries]
+    if all(h in done for h in hashes):
+        return np.vstack([done[h] for h in hashes]).astype("float32")
+
+    path = index_path(prefix, args.out_dir)
+    if os.path.exists(path) and read_index_meta(prefix, args.out_dir)["embedder"] == embedder.name:
+        try:
+            act_index = faiss.read_index(path)
+            return act_index.reconstruct_n(0, act_index.ntotal)
+        except RuntimeError:
+            pass
+    print(f"⚠️ {act}: no checkpoint or reconstructable {embedder.name} index in {args.out_dir}, "
+          "left out of the unified index")
+    return None
+
+
+def build_corpus(act, prefix, embedder, args):
+    """Embed whatever is missing from the checkpoint, then write the FAISS index"""
+    started = time.monotonic()
+    entries = load_entries(prefix, args)
+
+    hashes = [text_hash(embedder.name, section_text(entry)) for entry in entries]
+    ckpt_path = checkpoint_path(prefix, args.out_dir)
+    done = {} if args.force else load_checkpoint(ckpt_path)
+
+    todo = {}
+    for h, entry in zip(hashes, entries):
+        if h not in done:
+            todo.setdefault(h, section_text(entry))
+    todo = list(todo.items())
+    print(f"📚 {act}: {len(entries)} sections, {len(entries) - len(todo)} unchanged, {len(todo)} to embed")
+
+    batch_size = min(args.batch_size, embedder.max_batch_size)
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    # Same client layer as serving; a long build rides out outages instead of tripping a breaker
+    client = LLMClient(embedder, embed_policy=CallPolicy(
+        timeout=args.timeout,
+        attempts=args.retries,
+        base_delay=1.0,
+        max_delay=30.0,
+        rate=args.rate_limit,
+        breaker=CircuitBreaker(failure_threshold=0),
+        retry_if=is_transient,
+        label=f"{act} batch"
+    ))
+    lock = threading.Lock()
+
+    def embed_batch(batch):
+        return batch, client.embed([text for _, text in batch])
+
+    error = None
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = [pool.submit(embed_batch, batch) for batch in batches]
+        for n, future in enumerate(as_completed(futures), 1):
+            if future.cancelled():
+                continue
+            try:
+                batch, vectors = future.result()
+            except Exception as e:
+                print(f"   ❌ batch {n}/{len(batches)} failed: {e}")
+                if error is None:
+                    # Spend no more quota; batches already running still get checkpointed
+                    error = e
+                    for other in futures:
+                        other.cancel()
+                continue
+            with lock:
+                for (h, _), vec in zip(batch, vectors):
+                    done[h] = np.asarray(vec, dtype="float32")
+                save_checkpoint(ckpt_path, done)
+            print(f"   ✅ batch {n}/{len(batches)} ({len(batch)} sections)")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    if error is not None:
+        print(f"💾 {act}: {len(done)} embeddings checkpointed, a rerun resumes from there")
+        raise error
+
+    # Checkpoint only what the current data still uses
+    done = {h: done[h] for h in set(hashes)}
+    save_checkpoint(ckpt_path, done)
+
+    embeddings = np.vstack([done[h] for h in hashes]).astype("float32")
+    index = make_index(args.index_type, embeddings)
+
+    out_path = index_path(prefix, args.out_dir)
+    write_index(index, out_path, {
+        "act": act,
+        "embedder": embedder.name,
+        "dimension": int(embeddings.shape[1]),
+        "count": len(entries),
+        "index_type": args.index_type,
+        "metric": index_metric(args.index_type),
+    })
+
+    print(f"✅ {act}: wrote {index.ntotal} vectors ({args.index_type}) to {out_path} "
+          f"in {time.monotonic() - started:.1f}s")
+    return embeddings
+
+
+def build_unified(act_vectors, embedder, args):
+    """One index over every act's vectors with a row -> [act, section row] map"""
+    vectors, ids = [], []
+    for act, _ in CORPORA:
+        if act_vectors.get(act) is not None:
+            vectors.append(act_vectors[act])
+            ids.extend([act, row] for row in range(len(act_vectors[act])))
+
+    vectors = np.vstack(vectors)
+    index = make_index(args.index_type, vectors)
+
+    out_path = unified_index_path(args.out_dir)
+    write_index(index, out_path, {
+        "act": "ALL",
+        "embedder": embedder.name,
+        "dimension": int(vectors.shape[1]),
+        "count": len(ids),
+        "index_type": args.index_type,
+        "metric": index_metric(args.index_type),
+    })
+    with open(unified_ids_path(args.out_dir), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    print(f"✅ Unified index: wrote {index.ntotal} vectors ({args.index_type}) to {out_path}")
+
+
+def parse_args(argv=None):
+    acts = [act for act, _ in CORPORA]
+    parser = argparse.ArgumentParser(description="Build VAJRA's FAISS indices")
+    parser.add_argument("--acts", nargs="+", choices=acts, default=acts, help="corpora to build (default: all)")
+    parser.add_argument("--embedder", choices=list(EMBEDDERS), default="gemini")
+    parser.add_argument("--model", help="embedding model (default: the embedder's own default)")
+    parser.add_argument("--threads", type=int, default=0, help="local embedder CPU threads (0 = library default)")
+    parser.add_argument("--onnx", action="store_true", help="run the local embedder on ONNX Runtime")
+    parser.add_argument("--quantize", action="store_true", help="use the local model's int8 ONNX export")
+    parser.add_argument("--index-type", choices=list(INDEX_TYPES), default=DEFAULT_INDEX_TYPE,
+                        help="FAISS index to build: " + "; ".join(f"{k}: {v[1]}" for k, v in INDEX_TYPES.items()))
+    parser.add_argument("--batch-size", type=int, default=100, help="sections per embedding request")
+    parser.add_argument("--workers", type=int, default=4, help="embedding requests in flight")
+    parser.add_argument("--rate-limit", type=float, default=5.0, help="embedding requests per second (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=5, help="attempts per batch before giving up")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per embedding request")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where the <act>_data.json files live")
+    parser.add_argument("--out-dir", default=None, help="where to write indices and checkpoints (default: --data-dir)")
+    parser.add_argument("--force", action="store_true", help="ignore checkpoints and re-embed everything")
+    args = parser.parse_args(argv)
+    args.out_dir = args.out_dir or args.data_dir
+    return args
+
+
+def embedder_options(args):
+    """get_embedder options for the chosen embedder from the command line"""
+    options = {"model": args.model} if args.model else {}
+    if args.embedder == "local":
+        options.update(threads=args.threads, onnx=args.onnx, quantize=args.quantize)
+    elif args.embedder == "fake" and args.model:
+        raise ValueError("The fake embedder has no --model")
+    return options
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.embedder == "gemini":
+        import google.generativeai as genai
+
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable not set.")
+        genai.configure(api_key=api_key)
+
+    embedder = get_embedder(args.embedder, **embedder_options(args))
+    os.makedirs(args.out_dir, exist_ok=True)
+    act_vectors = {}
+    for act, prefix in CORPORA:
+        if act in args.acts:
+            act_vectors[act] = build_corpus(act, prefix, embedder, args)
+        else:
+            act_vectors[act] = existing_vectors(act, prefix, embedder, args)
+    build_unified(act_vectors, embedder, args)
+
+    # The snapshot holds exact vectors, so it only stands in for flat indices
+    if args.out_dir == args.data_dir and args.index_type.startswith("flat"):
+        compile_snapshot(args.data_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,202 +4,795 @@ VAJRA CLI Agent - Command Line Legal Assistant
 Interactive legal assistant powered by BNS, BSA and BNSS
 """
 
+import asyncio
+import contextlib
+import contextvars
+import functools
 import json
 import faiss
 import numpy as np
 import google.generativeai as genai
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from batcher import RetrievalBatcher
+from context_budget import ContextBudgeter, format_section
+from corpora import (CORPORA, corpus_files, data_path, index_path, read_index_meta,
+                     unified_ids_path, unified_index_path)
+from corpus_state import CorpusVersion, CorpusWatcher, pinned_corpus
+from embedding_cache import EmbeddingCache
+from index_factory import prepare_query, to_similarity
+from keyword_index import reciprocal_rank_fusion
+from llm_client import make_client
+from metrics import METRICS, SIZE_BUCKETS, TOKEN_BUCKETS
+from reranker import make_reranker
+from response_cache import ResponseCache, corpus_fingerprint
+from sessions import format_history, is_follow_up, make_session_store
+from snapshot import load_snapshot
+
+NO_RESULTS_MESSAGE = "❌ Sorry, I couldn't find relevant legal information for your query."
+SERVICE_ERROR_MESSAGE = "⚠️ VAJRA can't reach its language service right now. Please try again in a minute."
+# Act-filtered unified searches fetch this many times k before filtering
+UNIFIED_OVERFETCH = 4
+# Keyword hits considered for fusion with the vector results
+LEXICAL_K = 10
+# Session key for the interactive CLI's own conversation
+CLI_SENDER = "cli"
+
+SYSTEM_INSTRUCTION = """You are VAJRA (Virtual Assistant for Justice, Rights, and Accountability), 
+a legal assistant trained on:
+- Bharatiya Nyaya Sanhita (BNS)
+- Bharatiya Sakshya Adhiniyam (BSA)
+- Bharatiya Nagarik Suraksha Sanhita (BNSS)
+
+Each question comes with context retrieved from these law databases.
+
+Instructions:
+- Always answer in plain text (no bold, no markdown, use bullet points if necessary).
+- Mention section numbers and specify whether they belong to BNS, BSA, or BNSS.
+- Explain legal concepts in clear, simple language with examples if helpful.
+- If the question is outside these laws, state that clearly.
+- Always remind the user this is general information only and they should consult a qualified lawyer.
+- If the query is urgent, provide the most relevant helpline numbers:
+  Police / Emergency: 100
+  Women’s Helpline: 1091
+  NCW WhatsApp: 7827170170
+  Childline: 1098
+  Cyber Crime Helpline: 1930
+  Legal Aid (NALSA): 15100
+  Ambulance: 102 or 108
+- The LLM must handle queries in multiple languages and respond in the same language.
+- Provide comparative insights where relevant (old IPC/CrPC/Evidence Act vs new BNS/BNSS/BSA).
+- Provide historical context and reasons for introduction of new laws.
+- Handle hypothetical scenarios, always with the disclaimer this is not legal advice.
+- Recognize and respond to queries about related legal concepts (Constitution, SC judgments, etc).
+- Mention implementation status of the new laws and public debates if relevant."""
+
 class VajraCLI:
     def __init__(self):
         self.setup_api()
+        self.top_k = int(os.getenv("VAJRA_TOP_K", "9"))
+        self.hybrid = os.getenv("VAJRA_HYBRID", "1") != "0"
+        self.context_budgeter = ContextBudgeter(
+            max_tokens=int(os.getenv("VAJRA_CONTEXT_TOKENS", "1000")),
+            min_similarity=float(os.getenv("VAJRA_MIN_SIMILARITY", "0.3")),
+            max_overlap=float(os.getenv("VAJRA_MAX_OVERLAP", "0.8")),
+            examples=os.getenv("VAJRA_CONTEXT_EXAMPLES") == "1"
+        )
         self.load_data()
+        self.check_embedder()
+        self.embedding_cache = EmbeddingCache(
+            self.llm.embedder.name,
+            max_size=int(os.getenv("VAJRA_EMBED_CACHE_SIZE", "1024")),
+            cache_dir=os.getenv("VAJRA_EMBED_CACHE_DIR") or None
+        )
+        self.response_cache = ResponseCache(
+            max_distance=float(os.getenv("VAJRA_RESPONSE_CACHE_DISTANCE", "0.05")),
+            max_size=int(os.getenv("VAJRA_RESPONSE_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("VAJRA_RESPONSE_CACHE_TTL", "3600")),
+            version=self.state.version,
+            watch_paths=[path for _, prefix in CORPORA for path in (data_path(prefix), index_path(prefix))]
+        )
+        # Per-sender turns and sections, so follow-ups skip a fresh retrieval
+        self.sessions = make_session_store()
+        # Optional cross-encoder pass over a wider candidate pool (VAJRA_RERANKER)
+        self.reranker = make_reranker()
+        self.start_executors()
         self.welcome_message()
     
     def setup_api(self):
-        """Configure Google Generative AI"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        # This makes the app stop if the key is missing, which is good.
-        raise ValueError("GOOGLE_API_KEY environment variable not set.")
-    genai.configure(api_key=api_key)
+        """Configure Google Generative AI and the shared embedding/generation client"""
+        if os.getenv("VAJRA_LLM_BACKEND", "gemini") == "gemini":
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                # This makes the app stop if the key is missing, which is good.
+                raise ValueError("GOOGLE_API_KEY environment variable not set.")
+            genai.configure(api_key=api_key)
+        # One model for every call: the static instructions go in once as the
+        # system instruction instead of being rebuilt into each prompt.
+        # Embedders hold no connections, so a forked worker keeps its parent's
+        # (a local model stays shared copy-on-write instead of loading again)
+        self.llm = make_client(
+            SYSTEM_INSTRUCTION, self.generation_config(),
+            index_embedder=read_index_meta(CORPORA[0][1])["embedder"],
+            embedder=self.llm.embedder if hasattr(self, "llm") else None
+        )
+
+    def start_executors(self):
+        """Thread pools owned by the agent (threads do not survive a fork)"""
+        # FAISS searches for the async pipeline run here, off the event loop
+        self.search_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("VAJRA_SEARCH_THREADS", "4")),
+            thread_name_prefix="vajra-search"
+        )
+        # Concurrent questions share one embedding call and one search per index
+        self.batcher = None
+        window_ms = float(os.getenv("VAJRA_BATCH_WINDOW_MS", "0"))
+        if window_ms > 0:
+            self.batcher = RetrievalBatcher(
+                self.embed_batch,
+                lambda q_embs, k: self.search_embeddings(q_embs, k=k),
+                max_batch=int(os.getenv("VAJRA_BATCH_MAX", "16")),
+                window_ms=window_ms,
+                workers=int(os.getenv("VAJRA_BATCH_WORKERS", "4")),
+                # Each batch searches the corpus version its requests are pinned to
+                scope=lambda: self.corpus
+            )
+        # Hot reload: poll the corpus files every VAJRA_RELOAD_INTERVAL seconds
+        self.reload_lock = threading.Lock()
+        self.corpus_watcher = None
+        interval = float(os.getenv("VAJRA_RELOAD_INTERVAL", "0"))
+        if interval > 0:
+            self.corpus_watcher = CorpusWatcher(
+                self.reload_data, corpus_files(), lambda: self.state.fingerprint, interval=interval
+            )
+
+    def stop_executors(self):
+        """Stop the agent's threads - e.g. in a gunicorn master that only forks workers"""
+        self.search_executor.shutdown(wait=False)
+        if self.batcher is not None:
+            self.batcher.shutdown()
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.stop()
+
+    def reinit_after_fork(self):
+        """Re-create everything that is not fork-safe; the corpus itself is shared copy-on-write.
+
+        Called by gunicorn.conf.py's post_fork in each worker.
+        """
+        # configure() drops the cached gRPC clients, new ones are made on first use
+        self.setup_api()
+        self.start_executors()
         
     def load_data(self):
-        """Load BNS + BSA + BNSS data and FAISS indices"""
+        """Load every registered corpus (BNS + BSA + BNSS data and FAISS indices)"""
         try:
-            # Get the directory of this script
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            data_dir = os.path.join(script_dir, "..", "data")
-            
-            # Load BNS
-            with open(os.path.join(data_dir, "bns_data.json"), "r", encoding="utf-8") as f:
-                self.bns_entries = json.load(f)
-            self.bns_index = faiss.read_index(os.path.join(data_dir, "bns_index.faiss"))
-            print(f"📚 Loaded {len(self.bns_entries)} BNS sections")
-
-            # Load BSA
-            with open(os.path.join(data_dir, "bsa_data.json"), "r", encoding="utf-8") as f:
-                self.bsa_entries = json.load(f)
-            self.bsa_index = faiss.read_index(os.path.join(data_dir, "bsa_index.faiss"))
-            print(f"📚 Loaded {len(self.bsa_entries)} BSA sections")
-
-            # Load BNSS
-            with open(os.path.join(data_dir, "bnss_data.json"), "r", encoding="utf-8") as f:    
-                self.bnss_entries = json.load(f)
-            self.bnss_index = faiss.read_index(os.path.join(data_dir, "bnss_index.faiss"))
-            print(f"📚 Loaded {len(self.bnss_entries)} BNSS sections")
-
+            self.swap_corpus(self.load_corpus())
         except FileNotFoundError as e:
             print(f"❌ Error loading data: {e}")
             print("Make sure the data files exist in the data directory")
             sys.exit(1)
 
-    def embed_text(self, text):
-        """Generate embedding for text using Google's model"""
+    def load_corpus(self, version=1):
+        """Read every corpus into a new, validated CorpusVersion without touching the one being served"""
+        started = time.perf_counter()
+        # Taken before reading, so files replaced mid-load still count as a change
+        fingerprint = corpus_fingerprint(corpus_files())
+        corpora, unified, prebuilt = {}, None, {}
+
+        # Memory-mapped snapshot when it matches the data files, JSON otherwise
+        snapshot = load_snapshot() if os.getenv("VAJRA_SNAPSHOT", "1") != "0" else None
+        if snapshot is not None:
+            corpora, snapshot_unified, prebuilt = snapshot
+        else:
+            for act, prefix in CORPORA:
+                with open(data_path(prefix), "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                index = faiss.read_index(index_path(prefix))
+                metric = read_index_meta(prefix)["metric"]
+                corpora[act] = {"entries": entries, "index": index, "metric": metric}
+
+        for act, _ in CORPORA:
+            source = "snapshot" if snapshot is not None else "JSON"
+            print(f"📚 Loaded {len(corpora[act]['entries'])} {act} sections ({source})")
+
+        if os.getenv("VAJRA_UNIFIED_INDEX") == "1":
+            unified = snapshot_unified if snapshot is not None else self.load_unified_index(corpora)
+
+        corpus = CorpusVersion(corpora, unified, version, fingerprint, **prebuilt)
+        METRICS.set("vajra_corpus_load_seconds", time.perf_counter() - started)
+        return corpus
+
+    def swap_corpus(self, corpus):
+        """Make corpus the live version - one assignment, so readers see the old or the new one whole"""
+        self.state = corpus
+        for act, prefix in CORPORA:
+            # Keep the per-act attributes (bns_entries, bns_index, ...) around
+            setattr(self, f"{prefix}_entries", corpus.corpora[act]["entries"])
+            setattr(self, f"{prefix}_index", corpus.corpora[act]["index"])
+            METRICS.set("vajra_corpus_sections", len(corpus.corpora[act]["entries"]), act=act)
+        METRICS.set("vajra_corpus_version", corpus.version)
+
+    def reload_data(self):
+        """Load the corpus files again off the request path and swap them in.
+
+        Requests already running finish on the version they started with; a
+        version that fails to load, validate or match the embedder is never served.
+        """
+        with self.reload_lock:
+            try:
+                corpus = self.load_corpus(self.state.version + 1)
+                self.check_embedder(corpus)
+            except Exception:
+                METRICS.inc("vajra_corpus_reloads_total", result="failed")
+                raise
+            self.swap_corpus(corpus)
+            # Answers cached from the old sections would outlive them; requests
+            # still on the old version can't store into the new one either
+            self.response_cache.clear(corpus.version)
+            if self.reranker is not None:
+                self.reranker.clear()
+            METRICS.inc("vajra_corpus_reloads_total", result="ok")
+        print(f"🔄 Corpus version {corpus.version} is live")
+        return corpus
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Serve everything inside from the version that is live now, even if a reload lands meanwhile"""
+        token = pinned_corpus.set(pinned_corpus.get() or self.state)
         try:
-            emb = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text
-            )["embedding"]
-            return np.array(emb, dtype="float32")
-        except Exception as e:
-            print(f"❌ Embedding error: {e}")
-            return None 
-    
-    def search_bns(self, query, k=3):
-        """Search for relevant BNS sections"""
-        q_emb = self.embed_text(query)
-        if q_emb is None:
-            return []
-        
-        q_emb = q_emb.reshape(1, -1)
-        distances, indices = self.bns_index.search(q_emb, k)
+            yield
+        finally:
+            pinned_corpus.reset(token)
+
+    @property
+    def corpus(self):
+        """The version this request is pinned to, else the live one"""
+        return pinned_corpus.get() or self.state
+
+    @property
+    def corpora(self):
+        return self.corpus.corpora
+
+    @property
+    def unified(self):
+        return self.corpus.unified
+
+    @property
+    def keyword_index(self):
+        return self.corpus.keyword_index
+
+    @property
+    def section_lookup(self):
+        return self.corpus.section_lookup
+
+    def check_embedder(self, corpus=None):
+        """Refuse to serve a corpus whose queries would be embedded by another model than built an index"""
+        corpus = corpus or self.state
+        embedder = self.llm.embedder
+        indices = [(act, prefix, corpus.corpora[act]["index"]) for act, prefix in CORPORA]
+        if corpus.unified is not None:
+            indices.append(("unified", "vajra", corpus.unified["index"]))
+        for label, prefix, index in indices:
+            built_by = read_index_meta(prefix)["embedder"]
+            if index.d != embedder.dimension or (built_by != embedder.name and not embedder.stand_in):
+                raise ValueError(
+                    f"The {label} index was built with {built_by} ({index.d} dimensions) but queries "
+                    f"would be embedded with {embedder.name} ({embedder.dimension} dimensions). "
+                    f"Rebuild the indices with build_index.py --embedder, or set VAJRA_EMBEDDER to match."
+                )
+
+    def load_unified_index(self, corpora):
+        """Single index over every act plus its row -> (act, section row) mapping.
+
+        Uses the index written by build_index.py when it is newer than every
+        per-act index and matches the loaded sections; otherwise merges the
+        per-act vectors in memory.
+        """
+        path, ids_path = unified_index_path(), unified_ids_path()
+        if os.path.exists(path) and os.path.exists(ids_path):
+            newest_act = max(os.path.getmtime(index_path(prefix)) for _, prefix in CORPORA)
+            if os.path.getmtime(path) >= newest_act:
+                index = faiss.read_index(path)
+                with open(ids_path, "r", encoding="utf-8") as f:
+                    ids = [(act, row) for act, row in json.load(f)]
+                if len(ids) == index.ntotal and all(
+                    act in corpora and row < len(corpora[act]["entries"]) for act, row in ids
+                ):
+                    print(f"📚 Loaded unified index ({index.ntotal} sections)")
+                    return {"index": index, "ids": ids, "metric": read_index_meta("vajra")["metric"]}
+            print("⚠️ Unified index is stale, merging per-act indices in memory")
+
+        metrics = {corpus["metric"] for corpus in corpora.values()}
+        vectors, ids = [], []
+        try:
+            for act, corpus in corpora.items():
+                act_index = corpus["index"]
+                vectors.append(act_index.reconstruct_n(0, act_index.ntotal))
+                ids.extend((act, row) for row in range(act_index.ntotal))
+        except RuntimeError:
+            vectors = None
+        if vectors is None or len(metrics) > 1:
+            print("⚠️ Per-act indices can't be merged (compressed or mixed types), "
+                  "run build_index.py for a unified index - searching per act")
+            return None
+        vectors = np.vstack(vectors)
+        metric = metrics.pop()
+        index = faiss.IndexFlatIP(vectors.shape[1]) if metric == "ip" else faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        print(f"📚 Built unified index ({index.ntotal} sections)")
+        return {"index": index, "ids": ids, "metric": metric}
+
+    def embed_text(self, text):
+        """Generate embedding for text (cached); raises once the client's retries are exhausted"""
+        cached = self.embedding_cache.get(text)
+        if cached is not None:
+            return cached
+        with METRICS.stage("embed"):
+            emb = self.llm.embed([text])[0]
+        self.embedding_cache.put(text, emb)
+        return emb
+
+    def embed_batch(self, texts):
+        """Embeddings for several texts, the cache misses in one API call"""
+        embeddings = [self.embedding_cache.get(text) for text in texts]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if not missing:
+            return embeddings
+        with METRICS.stage("embed"):
+            result = self.llm.embed([texts[i] for i in missing])
+        for i, emb in zip(missing, result):
+            embeddings[i] = emb
+            self.embedding_cache.put(texts[i], emb)
+        return embeddings
+
+    def search_all(self, query, k=3, acts=None):
+        """Embed the query once and search it against every registered corpus"""
+        return self.search_embedding(self.embed_text(query), k=k, acts=acts)
+
+    def search_embedding(self, q_emb, k=3, acts=None):
+        """Search a query embedding: global top-k on the unified index, else k hits per act.
+
+        relevance_score is the index's raw distance; similarity is the cosine
+        similarity, comparable across acts and index types.
+        """
+        return self.search_embeddings(q_emb, k=k, acts=acts)[0]
+
+    def search_embeddings(self, q_embs, k=3, acts=None):
+        """search_embedding for a stacked query matrix - one FAISS search per index, a result list per row"""
+        q_embs = np.asarray(q_embs, dtype="float32")
+        q_embs = q_embs.reshape(-1, q_embs.shape[-1])
+        dimension = (self.unified or next(iter(self.corpora.values())))["index"].d
+        if q_embs.shape[1] != dimension:
+            raise ValueError(f"Query embeddings have {q_embs.shape[1]} dimensions, the indices {dimension}")
+        if self.unified is not None:
+            return self.search_unified(q_embs, k=k, acts=acts)
+
+        batch_results = [[] for _ in range(len(q_embs))]
+        for act, corpus in self.corpora.items():
+            if acts is not None and act not in acts:
+                continue
+            entries = corpus["entries"]
+            with METRICS.stage("search", index=act):
+                distances, indices = corpus["index"].search(prepare_query(corpus["metric"], q_embs), k)
+            for results, row_distances, row_indices in zip(batch_results, distances, indices):
+                for distance, idx in zip(row_distances, row_indices):
+                    if 0 <= idx < len(entries):
+                        entry = entries[idx].copy()
+                        entry['act'] = act
+                        entry['relevance_score'] = float(distance)
+                        entry['similarity'] = to_similarity(corpus["metric"], distance)
+                        results.append(entry)
+        return batch_results
+
+    def search_unified(self, q_embs, k, acts=None):
+        """True top-k across all acts, de-duplicated and ranked by one similarity score"""
+        index, metric = self.unified["index"], self.unified["metric"]
+        q_embs = prepare_query(metric, q_embs)
+        batch_results = [None] * len(q_embs)
+        pending = list(range(len(q_embs)))
+        fetch = k if acts is None else k * UNIFIED_OVERFETCH
+        while pending:
+            fetch = min(fetch, index.ntotal)
+            with METRICS.stage("search", index="unified"):
+                distances, indices = index.search(q_embs[pending], fetch)
+            short = []
+            for row, distances_row, indices_row in zip(pending, distances, indices):
+                results = self.collect_unified(distances_row, indices_row, k, acts)
+                if len(results) == k or fetch >= index.ntotal:
+                    batch_results[row] = results
+                else:
+                    short.append(row)
+            # Filter or duplicates ate into the top hits - widen and retry those rows
+            pending = short
+            fetch *= UNIFIED_OVERFETCH
+        return batch_results
+
+    def collect_unified(self, distances, indices, k, acts=None):
+        """First k distinct (act, section) hits of one unified-index result row"""
+        ids, metric = self.unified["ids"], self.unified["metric"]
+        results, seen = [], set()
+        for distance, idx in zip(distances, indices):
+            if idx < 0:
+                continue
+            act, row = ids[idx]
+            if acts is not None and act not in acts:
+                continue
+            entry = self.corpora[act]["entries"][row]
+            key = (act, entry['section_number'])
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = entry.copy()
+            entry['act'] = act
+            entry['relevance_score'] = float(distance)
+            entry['similarity'] = to_similarity(metric, distance)
+            results.append(entry)
+            if len(results) == k:
+                break
+        return results
 
+    def lookup_sections(self, query):
+        """(sections the query cites by number - "BNS 318", "section 35 of BNSS" -, whether
+        every cited number resolved) - no embedding needed"""
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.bns_entries):
-                entry = self.bns_entries[idx].copy()
-                entry['relevance_score'] = float(distances[0][i])
+        with METRICS.stage("section_lookup"):
+            hits, missing = self.section_lookup.resolve(query)
+        for act, row in hits:
+            entry = dict(self.corpora[act]["entries"][row], act=act, cited=True)
+            entry['relevance_score'] = 0.0
+            entry['similarity'] = 1.0
+            results.append(entry)
+        return results, not missing
+
+    def cite_first(self, cited, results):
+        """Cited sections ahead of the retrieved ones, without duplicates"""
+        if not cited:
+            return results
+        print(f"🎯 {len(cited)} referenced section(s) found, searching for the rest")
+        keys = {(c['act'], c['section_number']) for c in cited}
+        return cited + [c for c in results if (c['act'], c['section_number']) not in keys]
+
+    def follow_up_session(self, query, sender):
+        """The sender's session when the question follows up on its last answer, else None"""
+        if sender is None or self.sessions is None:
+            return None
+        session = self.sessions.get(sender)
+        if session and session["sections"] and is_follow_up(query):
+            return session
+        return None
+
+    def reuse_sections(self, query, session):
+        """Sections behind the sender's last answer (fused with keyword hits) - no embedding call"""
+        results = []
+        for act, section_number in session["sections"]:
+            row = self.section_lookup.row(act, section_number)
+            if act in self.corpora and row is not None:
+                entry = dict(self.corpora[act]["entries"][row], act=act)
+                entry['relevance_score'] = 0.0
+                entry['similarity'] = 1.0
                 results.append(entry)
+        print(f"🧵 Follow-up: reusing the {len(results)} section(s) behind the last answer")
+        if self.hybrid:
+            # Room for keyword hits on the new wording beside the reused sections
+            results = self.fuse_lexical(query, results, k=max(len(results), self.top_k))
         return results
 
+    def remember(self, sender, query, answer, section_ids):
+        """Record a turn in the sender's session"""
+        if sender is not None and self.sessions is not None:
+            self.sessions.record(sender, query, answer, section_ids)
+
+    def fuse_lexical(self, query, results, k=None):
+        """Reciprocal-rank fusion of the vector hits with BM25 keyword hits - k results,
+        by default as many as there were vector hits"""
+        with METRICS.stage("keyword"):
+            lexical = self.keyword_index.search(query, k=LEXICAL_K)
+        if not lexical:
+            return results
+
+        by_key = {(c['act'], c['section_number']): c for c in results}
+        vector_ranking = [
+            (c['act'], c['section_number']) for c in sorted(results, key=lambda c: -c['similarity'])
+        ]
+        lexical_ranking = []
+        for act, row, score in lexical:
+            entry = self.corpora[act]["entries"][row]
+            key = (act, entry['section_number'])
+            if key in lexical_ranking:
+                continue
+            if key not in by_key:
+                by_key[key] = dict(entry, act=act)
+            by_key[key]['keyword_score'] = score
+            lexical_ranking.append(key)
+
+        fused = []
+        for key, score in reciprocal_rank_fusion([vector_ranking, lexical_ranking])[:k or len(results) or self.top_k]:
+            by_key[key]['fusion_score'] = score
+            fused.append(by_key[key])
+        return fused
+
+    def retrieve(self, query):
+        """(query embedding or None, vector hits) for generation - micro-batched when enabled"""
+        if self.batcher is not None:
+            return self.batcher.retrieve(query, self.retrieval_k())
+        q_emb = self.embed_text(query)
+        return q_emb, self.search_embedding(q_emb, k=self.retrieval_k())
+
+    def retrieval_k(self):
+        """k for generation: global top-k on the unified index, 3 per act otherwise -
+        the re-ranker's candidate pool (split across acts) when one is configured"""
+        if self.reranker is not None:
+            pool = self.reranker.candidates
+            return pool if self.unified is not None else -(-pool // len(self.corpora))
+        return self.top_k if self.unified is not None else 3
+
+    def rerank(self, query, results):
+        """Best few retrieved sections by cross-encoder score, when a re-ranker is configured"""
+        if self.reranker is None:
+            return results
+        return self.reranker.rerank(query, results, self.corpus.version)
+
+    async def arerank(self, query, results):
+        """rerank on the search thread pool - cross-encoder inference is CPU-bound"""
+        if self.reranker is None:
+            return results
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.search_executor, self.reranker.rerank, query, results, self.corpus.version
+        )
+
+    def search_bns(self, query, k=3):
+        """Search for relevant BNS sections"""
+        return self.search_all(query, k=k, acts=["BNS"])
+
     def search_bsa(self, query, k=3):
         """Search for relevant BSA sections"""
-        q_emb = self.embed_text(query)
-        if q_emb is None:
-            return []
-        
-        q_emb = q_emb.reshape(1, -1)
-        distances, indices = self.bsa_index.search(q_emb, k)
-        
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.bsa_entries):
-                entry = self.bsa_entries[idx].copy()
-                entry['relevance_score'] = float(distances[0][i])
-                results.append(entry)
-        return results
+        return self.search_all(query, k=k, acts=["BSA"])
 
     def search_bnss(self, query, k=3):
         """Search for relevant BNSS sections"""
-        q_emb = self.embed_text(query)
-        if q_emb is None:
-            return []
-        
-        q_emb = q_emb.reshape(1, -1)
-        distances, indices = self.bnss_index.search(q_emb, k)
-        
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.bnss_entries):
-                entry = self.bnss_entries[idx].copy()
-                entry['relevance_score'] = float(distances[0][i])
-                results.append(entry)
-        return results
+        return self.search_all(query, k=k, acts=["BNSS"])
 
-    def generate_response(self, query):
-        """Generate legal response using RAG from BNS + BSA + BNSS"""
-        print("🔍 Searching relevant legal sections...")
+    def build_context(self, results):
+        """Group retrieved sections by act into the prompt context block"""
+        context_text = ""
+        for act in self.corpora:
+            act_results = [c for c in results if c['act'] == act]
+            if act_results:
+                context_text += f"{act} Context:\n"
+                context_text += "\n".join([
+                    format_section(c, c.get('with_examples', False))
+                    for c in act_results
+                ]) + "\n\n"
+        return context_text
+
+    def pack_context(self, results):
+        """Sections that fit the context token budget, and their context block"""
+        with METRICS.stage("context"):
+            selected, tokens = self.context_budgeter.select(results)
+            context_text = self.build_context(selected)
+        print(f"📦 Context: {len(selected)} of {len(results)} sections, ~{tokens} tokens")
+        return selected, context_text
+
+    def build_prompt(self, query, context_text, history=""):
+        """Per-question prompt: recent turns for a follow-up, retrieved context and the question
+        (instructions are the system instruction)"""
+        history_text = f"Conversation so far:\n{history}\n\n" if history else ""
+        return f"""{history_text}Context from law databases:
+{context_text}
+User Question: {query}
+
+Answer:"""
+
+    def generation_config(self):
+        """Sampling settings shared by every generation call"""
+        return genai.types.GenerationConfig(
+            temperature=0.2,
+            max_output_tokens=300
+        )
+
+    def gather_sections(self, query, session):
+        """(sections that need no vector search, cited sections to put ahead of the search).
+
+        The first is every section the question cites when all of them resolve,
+        or those behind the last answer for a follow-up - else None, and a search
+        has to run.
+        """
+        cited, complete = self.lookup_sections(query)
+        if cited and complete:
+            print(f"🎯 Using the {len(cited)} section(s) referenced in the question")
+            return cited, []
+        if session is not None and not cited:
+            return self.reuse_sections(query, session), []
+        return None, cited
+
+    def plan_answer(self, query, session, results, q_emb, embed_failed):
+        """Context and prompt for the retrieved sections - or the answer itself
+        when nothing was found or a near-duplicate question was answered already.
+
+        Returns (answer, None, None, section_ids, version) without generation
+        (section_ids is None when nothing was found), else (None, prompt, q_emb,
+        section_ids, version) - version is the corpus version the sections came from.
+        """
+        version = self.corpus.version
+        if not results:
+            METRICS.inc("vajra_answers_total", source="service_error" if embed_failed else "no_results")
+            return SERVICE_ERROR_MESSAGE if embed_failed else NO_RESULTS_MESSAGE, None, None, None, version
         
-        # Search across multiple sources
-        bns_context = self.search_bns(query, k=3)
-        bsa_context = self.search_bsa(query, k=3)
-        bnss_context = self.search_bnss(query, k=3)
+        selected, context_text = self.pack_context(results)
         
-        if not (bns_context or bsa_context or bnss_context):
-            return "❌ Sorry, I couldn't find relevant legal information for your query."
+        # Near-duplicate of an answered question over the same sections?
+        section_ids = [(c['act'], c['section_number']) for c in selected]
+        cached = self.response_cache.lookup(q_emb, section_ids, version) if q_emb is not None else None
+        if cached is not None:
+            print("⚡ Answered from response cache")
+            METRICS.inc("vajra_answers_total", source="response_cache")
+            return cached, None, None, section_ids, version
         
-        # Build combined context text
-        context_text = ""
-        if bns_context:
-            context_text += "BNS Context:\n"
-            context_text += "\n".join([
-                f"Section {c['section_number']} - {c['section_title']}: {c['description']}"
-                for c in bns_context
-            ]) + "\n\n"
-        if bsa_context:
-            context_text += "BSA Context:\n"
-            context_text += "\n".join([
-                f"Section {c['section_number']} - {c['section_title']}: {c['description']}"
-                for c in bsa_context
-            ]) + "\n\n"
-        if bnss_context:
-            context_text += "BNSS Context:\n"
-            context_text += "\n".join([
-                f"Section {c['section_number']} - {c['section_title']}: {c['description']}"
-                for c in bnss_context
-            ]) + "\n\n"
+        prompt = self.build_prompt(query, context_text, format_history(session) if session else "")
+        METRICS.observe("vajra_prompt_chars", len(prompt), buckets=SIZE_BUCKETS)
+        return None, prompt, q_emb, section_ids, version
+
+    def prepare_generation(self, query, sender=None):
+        """Retrieval half of generate_response / stream_response, read from one
+        corpus version - returns plan_answer's tuple"""
+        print("🔍 Searching relevant legal sections...")
+        with self.pinned():
+            # Cited sections go straight into the context, a follow-up reuses the
+            # last answer's sections, otherwise one embedding searched across every source
+            session = self.follow_up_session(query, sender)
+            q_emb, embed_failed = None, False
+            results, cited = self.gather_sections(query, session)
+            if results is None:
+                try:
+                    q_emb, results = self.retrieve(query)
+                except Exception as e:
+                    # Degrade to keyword-only retrieval rather than pretend nothing matched
+                    print(f"⚠️ Embedding failed ({e}), falling back to keyword search")
+                    results, embed_failed = [], True
+                if self.hybrid:
+                    results = self.fuse_lexical(query, results)
+                results = self.cite_first(cited, self.rerank(query, results))
+            answer, prompt, q_emb, section_ids, version = self.plan_answer(
+                query, session, results, q_emb, embed_failed
+            )
+        if answer is not None and section_ids:
+            self.remember(sender, query, answer, section_ids)
+        return answer, prompt, q_emb, section_ids, version
+
+    def generate_response(self, query, sender=None):
+        """Generate legal response using RAG from BNS + BSA + BNSS.
         
-        # Create prompt
-        prompt = f"""You are VAJRA (Virtual Assistant for Justice, Rights, and Accountability), 
-a legal assistant trained on:
-- Bharatiya Nyaya Sanhita (BNS)
-- Bharatiya Sakshya Adhiniyam (BSA)
-- Bharatiya Nagarik Suraksha Sanhita (BNSS)
+        sender (Twilio's From) keys the conversation session used for follow-ups.
+        """
+        with METRICS.stage("answer"):
+            answer, prompt, q_emb, section_ids, version = self.prepare_generation(query, sender)
+            if answer is not None:
+                return answer
+            
+            print("🤖 Generating response...")
+            try:
+                with METRICS.stage("generate"):
+                    generation = self.llm.generate(prompt)
+                text = generation["text"]
+                self.store_answer(text, generation, q_emb, section_ids, version)
+                self.remember(sender, query, text, section_ids)
+                return text
+            except Exception as e:
+                return f"❌ Error generating response: {e}"
 
-Context from law databases:
-{context_text}
+    def record_answer(self, text, generation):
+        """Count a generated answer, its size and the prompt/output tokens the model billed"""
+        METRICS.inc("vajra_answers_total", source="generated")
+        METRICS.observe("vajra_response_chars", len(text), buckets=SIZE_BUCKETS)
+        if generation["prompt_tokens"]:
+            METRICS.observe("vajra_prompt_tokens", generation["prompt_tokens"], buckets=TOKEN_BUCKETS)
+            METRICS.observe("vajra_output_tokens", generation["output_tokens"], buckets=TOKEN_BUCKETS)
+            print(f"🧮 {generation['prompt_tokens']} prompt tokens, {generation['output_tokens']} output tokens")
 
-User Question: {query}
+    def store_answer(self, text, generation, q_emb, section_ids, version):
+        """Record a complete generated answer and cache it for near-duplicate questions"""
+        self.record_answer(text, generation)
+        if q_emb is not None:
+            self.response_cache.store(q_emb, section_ids, text, version)
 
-Instructions:
-- Always answer in plain text (no bold, no markdown, use bullet points if necessary).
-- Mention section numbers and specify whether they belong to BNS, BSA, or BNSS.
-- Explain legal concepts in clear, simple language with examples if helpful.
-- If the question is outside these laws, state that clearly.
-- Always remind the user this is general information only and they should consult a qualified lawyer.
-- If the query is urgent, provide the most relevant helpline numbers:
-  Police / Emergency: 100
-  Women’s Helpline: 1091
-  NCW WhatsApp: 7827170170
-  Childline: 1098
-  Cyber Crime Helpline: 1930
-  Legal Aid (NALSA): 15100
-  Ambulance: 102 or 108
-- The LLM must handle queries in multiple languages and respond in the same language.
-- Provide comparative insights where relevant (old IPC/CrPC/Evidence Act vs new BNS/BNSS/BSA).
-- Provide historical context and reasons for introduction of new laws.
-- Handle hypothetical scenarios, always with the disclaimer this is not legal advice.
-- Recognize and respond to queries about related legal concepts (Constitution, SC judgments, etc).
-- Mention implementation status of the new laws and public debates if relevant.
+    def stream_response(self, query, sender=None):
+        """generate_response as a generator of text chunks, yielded as Gemini produces them"""
+        answer, prompt, q_emb, section_ids, version = self.prepare_generation(query, sender)
+        if answer is not None:
+            yield answer
+            return
 
-Answer:"""
-        
         print("🤖 Generating response...")
+        chunks = []
+        started = time.perf_counter()
         try:
-            model = genai.GenerativeModel('gemini-2.0-flash-lite')
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.2,
-                    max_output_tokens=300
-                )
-            )
-            return response.text
+            with METRICS.stage("generate"):
+                for chunk in self.llm.stream(prompt):
+                    if not chunks:
+                        METRICS.observe("vajra_stage_seconds", time.perf_counter() - started, stage="first_chunk")
+                    chunks.append(chunk["text"])
+                    yield chunk["text"]
         except Exception as e:
-            return f"❌ Error generating response: {e}"
+            yield ("\n" if chunks else "") + f"❌ Error generating response: {e}"
+            return
+        # Only complete answers are worth caching
+        if chunks:
+            self.store_answer("".join(chunks), chunk, q_emb, section_ids, version)
+            self.remember(sender, query, "".join(chunks), section_ids)
+
+    async def aembed_text(self, text):
+        """Async embed_text: awaits the embedding call instead of blocking"""
+        cached = await self.embedding_cache.aget(text)
+        if cached is not None:
+            return cached
+        with METRICS.stage("embed"):
+            emb = (await self.llm.aembed([text]))[0]
+        await self.embedding_cache.aput(text, emb)
+        return emb
+
+    async def asearch_embedding(self, q_emb, k=3, acts=None):
+        """Run the CPU-bound FAISS searches on the search thread pool"""
+        loop = asyncio.get_running_loop()
+        # The pool thread searches the version this request is pinned to
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.search_executor, functools.partial(context.run, self.search_embedding, q_emb, k=k, acts=acts)
+        )
+
+    async def aretrieve(self, query):
+        """Async retrieve: the embedding and search are awaited"""
+        if self.batcher is not None:
+            return await asyncio.wrap_future(self.batcher.submit(query, self.retrieval_k()))
+        q_emb = await self.aembed_text(query)
+        return q_emb, await self.asearch_embedding(q_emb, k=self.retrieval_k())
+
+    async def aprepare_generation(self, query, sender=None):
+        """prepare_generation with the embedding, search and re-ranking awaited"""
+        print("🔍 Searching relevant legal sections...")
+        with self.pinned():
+            # Session reads and writes can be SQLite queries - kept off the event loop
+            session = await asyncio.to_thread(self.follow_up_session, query, sender)
+            q_emb, embed_failed = None, False
+            results, cited = self.gather_sections(query, session)
+            if results is None:
+                try:
+                    q_emb, results = await self.aretrieve(query)
+                except Exception as e:
+                    print(f"⚠️ Embedding failed ({e}), falling back to keyword search")
+                    results, embed_failed = [], True
+                if self.hybrid:
+                    results = self.fuse_lexical(query, results)
+                results = self.cite_first(cited, await self.arerank(query, results))
+            answer, prompt, q_emb, section_ids, version = self.plan_answer(
+                query, session, results, q_emb, embed_failed
+            )
+        if answer is not None and section_ids:
+            await asyncio.to_thread(self.remember, sender, query, answer, section_ids)
+        return answer, prompt, q_emb, section_ids, version
+
+    async def agenerate_response(self, query, sender=None):
+        """Async generate_response for the ASGI webhook - never blocks the event loop"""
+        with METRICS.stage("answer"):
+            answer, prompt, q_emb, section_ids, version = await self.aprepare_generation(query, sender)
+            if answer is not None:
+                return answer
+            
+            print("🤖 Generating response...")
+            try:
+                with METRICS.stage("generate"):
+                    generation = await self.llm.agenerate(prompt)
+                text = generation["text"]
+                self.store_answer(text, generation, q_emb, section_ids, version)
+                await asyncio.to_thread(self.remember, sender, query, text, section_ids)
+                return text
+            except Exception as e:
+                return f"❌ Error generating response: {e}"
     
     def welcome_message(self):
         """Display welcome message"""
@@ -217,8 +810,10 @@ Answer:"""
 Available commands:
 • help          - Show this help message
 • quit/exit     - Exit the application
-• clear         - Clear the screen
+• clear         - Clear the screen and start a new conversation
 • sections      - Show number of loaded sections
+• cache         - Show embedding and response cache statistics
+• stats         - Show per-stage timings and counters
 • search <term> - Search for specific legal sections
 • examples      - Show example questions
 
@@ -226,6 +821,26 @@ Just type your legal question to get an answer!
         """
         print(help_text)
     
+    def show_stats(self):
+        """Per-stage latency and counters recorded so far in this session"""
+        if not METRICS.enabled:
+            print("📊 Metrics are disabled (VAJRA_METRICS=0)")
+            return
+        rows = METRICS.stage_summary()
+        if not rows:
+            print("📊 No timings yet - ask a question first")
+        else:
+            print(f"\n📊 {'stage':<22} {'count':>6} {'mean':>9} {'p50≤':>9} {'p95≤':>9} {'errors':>6}")
+            for label, count, mean, p50, p95, errors in rows:
+                print(f"   {label:<22} {count:>6} {mean * 1000:>7.1f}ms {p50 * 1000:>7.1f}ms "
+                      f"{p95 * 1000:>7.1f}ms {errors:>6}")
+        for (name, labels), value in sorted(METRICS.counters.items()):
+            if name != "vajra_stage_errors_total":
+                print(f"   {name} {' '.join(f'{k}={v}' for k, v in labels)}: {value}")
+        for (name, labels), value in sorted(METRICS.gauges.items()):
+            print(f"   {name} {' '.join(f'{k}={v}' for k, v in labels)}: {value:g}")
+        print()
+
     def show_examples(self):
         """Show example questions"""
         examples = [
@@ -242,19 +857,17 @@ Just type your legal question to get an answer!
         print()
     
     def search_sections(self, term):
-        """Search for sections containing specific terms in BNS"""
-        matching_sections = []
-        term_lower = term.lower()
-        
-        for entry in self.bns_entries:
-            if (term_lower in entry['section_title'].lower() or 
-                term_lower in entry['description'].lower()):
-                matching_sections.append(entry)
+        """Search every act for sections matching the terms, ranked by BM25"""
+        # "BNS 318" style references resolve exactly, anything else is ranked
+        hits = [(act, row, None) for act, row in self.section_lookup.find(term)]
+        hits = hits or self.keyword_index.search(term, k=5)
         
-        if matching_sections:
-            print(f"\n🔍 Found {len(matching_sections)} BNS sections matching '{term}':")
-            for section in matching_sections[:5]:  # Show first 5
-                print(f"\n📋 {section['section_number']} - {section['section_title']}")
+        if hits:
+            print(f"\n🔍 Top {len(hits)} sections matching '{term}':")
+            for act, row, score in hits:
+                section = self.corpora[act]["entries"][row]
+                match = "exact match" if score is None else f"score {score:.2f}"
+                print(f"\n📋 {act} {section['section_number']} - {section['section_title']} ({match})")
                 print(f"   {section['description'][:200]}...")
         else:
             print(f"❌ No sections found matching '{term}'")
@@ -276,11 +889,28 @@ Just type your legal question to get an answer!
                     self.show_help()
                 elif user_input.lower() == 'clear':
                     os.system('cls' if os.name == 'nt' else 'clear')
+                    if self.sessions is not None:
+                        self.sessions.delete(CLI_SENDER)
                     self.welcome_message()
                 elif user_input.lower() == 'sections':
-                    print(f"📚 Loaded {len(self.bns_entries)} BNS sections")
-                    print(f"📚 Loaded {len(self.bsa_entries)} BSA sections")
-                    print(f"📚 Loaded {len(self.bnss_entries)} BNSS sections")
+                    for act, corpus in self.corpora.items():
+                        print(f"📚 Loaded {len(corpus['entries'])} {act} sections")
+                elif user_input.lower() == 'cache':
+                    stats = self.embedding_cache.stats()
+                    print(f"🗂️ Embedding cache: {stats['hits']} hits ({stats['disk_hits']} from disk), "
+                          f"{stats['misses']} misses, hit rate {stats['hit_rate']:.0%}")
+                    print(f"   {stats['memory_entries']}/{stats['max_size']} in memory, "
+                          f"{stats['disk_entries']} on disk")
+                    stats = self.response_cache.stats()
+                    print(f"💾 Response cache: {stats['hits']} hits, {stats['misses']} misses, "
+                          f"hit rate {stats['hit_rate']:.0%}, {stats['entries']}/{stats['max_size']} answers")
+                    if self.reranker is not None:
+                        stats = self.reranker.stats()
+                        print(f"🏅 Re-rank scores: {stats['hits']} hits, {stats['misses']} misses, "
+                              f"hit rate {stats['hit_rate']:.0%}, {stats['entries']} pairs, "
+                              f"{stats['fallbacks']} over budget")
+                elif user_input.lower() == 'stats':
+                    self.show_stats()
                 elif user_input.lower() == 'examples':
                     self.show_examples()
                 elif user_input.lower().startswith('search '):
@@ -292,10 +922,15 @@ Just type your legal question to get an answer!
                 else:
                     # Generate legal response
                     print(f"\n⏰ {datetime.now().strftime('%H:%M:%S')} - Processing your query...")
-                    response = self.generate_response(user_input)
+                    chunks = self.stream_response(user_input, CLI_SENDER)
+                    first = next(chunks, "")
                     print(f"\n🏛️ VAJRA's Response:")
                     print("-" * 50)
-                    print(response)
+                    # Print the answer as it is generated
+                    print(first, end="", flush=True)
+                    for chunk in chunks:
+                        print(chunk, end="", flush=True)
+                    print()
                     print("-" * 50)
                     print("⚖️ Disclaimer: This is AI-generated legal information. Consult a qualified lawyer for specific legal advice.")
                     
@@ -0,0 +1,77 @@
+"""
+VAJRA Context Budget
+Packs retrieved sections into the prompt under a token budget: best-scored
+first, below-cutoff and near-duplicate sections dropped, examples optional
+"""
+
+from keyword_index import tokenize
+
+# Gemini averages roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_section(section, examples=False):
+    """One section's line in the context block (plus its examples when asked for)"""
+    text = f"Section {section['section_number']} - {section['section_title']}: {section['description']}"
+    if examples:
+        for example in section.get("examples") or []:
+            text += f"\n  Example: {example}"
+    return text
+
+
+def section_score(section):
+    """Ranking score: sections the question cites by number first, then the cross-encoder
+    score when re-ranked, the fused rank score when hybrid search ran, else cosine similarity"""
+    if section.get("cited"):
+        return float("inf")
+    if "rerank_score" in section:
+        return section["rerank_score"]
+    return section.get("fusion_score", section.get("similarity", 0.0))
+
+
+class ContextBudgeter:
+    """Greedy section selection under a token budget"""
+
+    def __init__(self, max_tokens=1000, min_similarity=0.3, max_overlap=0.8, examples=False):
+        self.max_tokens = max_tokens
+        self.min_similarity = min_similarity
+        self.max_overlap = max_overlap
+        self.examples = examples
+
+    def select(self, results):
+        """(selected sections, estimated context tokens) - the best section is always kept"""
+        ranked = sorted(results, key=section_score, reverse=True)
+        selected, token_sets, used = [], [], 0
+        for section in ranked:
+            # Keyword-only hits carry no similarity; fusion already vouched for them
+            if selected and section.get("similarity", 1.0) < self.min_similarity:
+                continue
+
+            tokens = set(tokenize(section["description"]))
+            if any(_overlap(tokens, other) >= self.max_overlap for other in token_sets):
+                continue
+
+            cost = estimate_tokens(format_section(section, self.examples))
+            with_examples = self.examples
+            if selected and used + cost > self.max_tokens and self.examples:
+                # Still room for the section without its examples?
+                cost = estimate_tokens(format_section(section))
+                with_examples = False
+            if selected and used + cost > self.max_tokens:
+                continue
+
+            selected.append(dict(section, with_examples=with_examples))
+            token_sets.append(tokens)
+            used += cost
+        return selected, used
+
+
+def _overlap(a, b):
+    """Jaccard overlap of two token sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
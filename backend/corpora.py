@@ -0,0 +1,62 @@
+"""
+VAJRA Corpus Registry
+The legal acts VAJRA can search, and where their data lives
+"""
+
+import json
+import os
+
+from embedders import EMBED_MODEL
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+
+# (act label, file prefix) - add a line here to register a new corpus.
+# Each corpus ships as <prefix>_data.json plus <prefix>_index.faiss in DATA_DIR.
+CORPORA = [
+    ("BNS", "bns"),
+    ("BSA", "bsa"),
+    ("BNSS", "bnss"),
+]
+
+
+def data_path(prefix, data_dir=DATA_DIR):
+    """Path of a corpus' section data JSON"""
+    return os.path.join(data_dir, f"{prefix}_data.json")
+
+
+def index_path(prefix, data_dir=DATA_DIR):
+    """Path of a corpus' FAISS index"""
+    return os.path.join(data_dir, f"{prefix}_index.faiss")
+
+
+def index_meta_path(prefix, data_dir=DATA_DIR):
+    """Path of the JSON sidecar describing how an index was built"""
+    return os.path.join(data_dir, f"{prefix}_index.json")
+
+
+def read_index_meta(prefix, data_dir=DATA_DIR):
+    """Build metadata of an index; indices without a sidecar are the original flat L2 Gemini ones"""
+    meta = {"index_type": "flat-l2", "metric": "l2", "embedder": EMBED_MODEL}
+    path = index_meta_path(prefix, data_dir)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            meta.update(json.load(f))
+    return meta
+
+
+def unified_index_path(data_dir=DATA_DIR):
+    """Path of the single FAISS index over every act"""
+    return os.path.join(data_dir, "vajra_index.faiss")
+
+
+def unified_ids_path(data_dir=DATA_DIR):
+    """Path of the unified index's row -> [act, section row] mapping"""
+    return os.path.join(data_dir, "vajra_index_ids.json")
+
+
+def corpus_files(data_dir=DATA_DIR):
+    """Every file a corpus load reads - a change to any of them means new data"""
+    paths = []
+    for _, prefix in CORPORA:
+        paths += [data_path(prefix, data_dir), index_path(prefix, data_dir), index_meta_path(prefix, data_dir)]
+    return paths + [unified_index_path(data_dir), unified_ids_path(data_dir), index_meta_path("vajra", data_dir)]
@@ -0,0 +1,95 @@
+"""
+VAJRA Corpus State
+Versioned corpus loads: every section, index and lookup built from one set of
+data files lives in one CorpusVersion, swapped in whole when the files
+change, while requests already running finish on the version they started with
+"""
+
+import contextvars
+import threading
+import time
+
+from keyword_index import KeywordIndex
+from response_cache import corpus_fingerprint
+from section_lookup import SectionLookup
+
+# The version a running request reads from; unset means the live one
+pinned_corpus = contextvars.ContextVar("vajra_corpus", default=None)
+
+
+def validate_corpora(corpora):
+    """Raise ValueError unless every act has exactly one vector per section"""
+    for act, corpus in corpora.items():
+        count, ntotal = len(corpus["entries"]), corpus["index"].ntotal
+        if count != ntotal:
+            raise ValueError(f"{act} has {count} sections but its index holds {ntotal} vectors")
+
+
+class CorpusVersion:
+    """One validated load of every corpus plus the keyword index and section lookup over it.
+
+    Never modified once built - a reload builds a new version beside it.
+    """
+
+    def __init__(self, corpora, unified=None, version=1, fingerprint=(), keyword_index=None, section_numbers=None):
+        validate_corpora(corpora)
+        self.corpora = corpora
+        self.unified = unified
+        # Prebuilt by the snapshot, so its sections aren't all decoded at load
+        self.keyword_index = keyword_index if keyword_index is not None else KeywordIndex(corpora)
+        self.section_lookup = SectionLookup(corpora, numbers=section_numbers)
+        self.version = version
+        self.fingerprint = fingerprint   # corpus files as they were before loading
+        self.loaded_at = time.time()
+
+    def summary(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "sections": {act: len(corpus["entries"]) for act, corpus in self.corpora.items()},
+            "unified": self.unified is not None,
+        }
+
+
+class CorpusWatcher:
+    """Polls the corpus files and calls reload() once a change has settled.
+
+    A change is picked up after the files stay the same for a whole interval,
+    so a half-copied index isn't loaded; a version that fails to load is not
+    retried until the files change again.
+    """
+
+    def __init__(self, reload, paths, current, interval=10.0):
+        self.reload = reload
+        self.paths = list(paths)
+        self.current = current           # fingerprint of the version being served
+        self.interval = interval
+        self.failed = None
+        self._pending = None
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="vajra-corpus-watcher", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """One poll; True when a reload was attempted"""
+        fingerprint = corpus_fingerprint(self.paths)
+        if fingerprint == self.current() or fingerprint == self.failed:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            self._pending = fingerprint
+            return False
+        self._pending = None
+        try:
+            self.reload()
+        except Exception as e:
+            self.failed = fingerprint
+            print(f"❌ Corpus reload failed, still serving the previous version: {e}")
+        return True
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,167 @@
+"""
+VAJRA Embedders
+Pluggable text embedders used to build and query the corpus indices
+"""
+
+import asyncio
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+EMBED_MODEL = "models/text-embedding-004"
+LOCAL_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# int8 ONNX export published alongside most sentence-transformers hub models
+QUANTIZED_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+class GeminiEmbedder:
+    """Google text-embedding model; embeds a whole batch in one request"""
+
+    max_batch_size = 100  # batchEmbedContents limit
+    stand_in = False
+
+    def __init__(self, model=EMBED_MODEL):
+        self.model = model
+        self.name = model
+        self.dimension = 768
+
+    def embed(self, texts, timeout=None):
+        import google.generativeai as genai
+
+        result = genai.embed_content(
+            model=self.model, content=list(texts), request_options=_request_options(timeout)
+        )["embedding"]
+        return np.array(result, dtype="float32")
+
+    async def aembed(self, texts, timeout=None):
+        import google.generativeai as genai
+
+        result = (await genai.embed_content_async(
+            model=self.model, content=list(texts), request_options=_request_options(timeout)
+        ))["embedding"]
+        return np.array(result, dtype="float32")
+
+
+def _request_options(timeout):
+    return {"timeout": timeout} if timeout else None
+
+
+class SentenceTransformerEmbedder:
+    """Local CPU sentence-transformers model - queries embed without a network round-trip.
+
+    threads caps torch's intra-op threads (0 = library default); onnx runs the
+    model on ONNX Runtime and quantize loads its int8 ONNX export instead.
+    """
+
+    max_batch_size = 256
+    stand_in = False
+
+    def __init__(self, model=LOCAL_EMBED_MODEL, threads=0, onnx=False, quantize=False, batch_size=64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "The local embedder needs sentence-transformers: pip install sentence-transformers"
+                + (" optimum[onnxruntime]" if onnx or quantize else "")
+            ) from None
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        options = {}
+        if onnx or quantize:
+            options["backend"] = "onnx"
+        if quantize:
+            options["model_kwargs"] = {"file_name": QUANTIZED_ONNX_FILE}
+
+        self.model = SentenceTransformer(model, device="cpu", **options)
+        # Quantized vectors stay in the full model's space, so they share its name
+        self.name = f"st:{model}"
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+    def embed(self, texts, timeout=None):
+        # One encode at a time - each already keeps every intra-op thread busy
+        with self._lock:
+            vectors = self.model.encode(
+                list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                convert_to_numpy=True, show_progress_bar=False
+            )
+        return np.asarray(vectors, dtype="float32")
+
+    async def aembed(self, texts, timeout=None):
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class FakeEmbedder:
+    """Bag-of-words embedder with no model or network (VAJRA_LLM_BACKEND=fake).
+
+    Every token maps to a fixed random unit vector and a text is the normalized
+    sum of its tokens, so texts sharing words land close together.
+    """
+
+    max_batch_size = 1000
+    stand_in = True   # may query any index of its dimension, whatever built it
+
+    def __init__(self, dim=768, latency=0.0):
+        self.dim = dim
+        self.dimension = dim
+        self.latency = latency   # simulated seconds per call
+        self.name = f"fake-{dim}"
+
+    def embed(self, texts, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return np.vstack([self._embed_one(text) for text in texts]).astype("float32")
+
+    async def aembed(self, texts, timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return np.vstack([self._embed_one(text) for text in texts]).astype("float32")
+
+    def _embed_one(self, text):
+        vec = np.zeros(self.dim, dtype="float32")
+        for token in text.lower().split():
+            vec += _token_vector(token.strip(".,;:!?()\"'"), self.dim)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+@lru_cache(maxsize=50000)
+def _token_vector(token, dim):
+    rng = np.random.default_rng(zlib.crc32(token.encode("utf-8")))
+    vec = rng.standard_normal(dim).astype("float32")
+    return vec / np.linalg.norm(vec)
+
+
+EMBEDDERS = {
+    "gemini": GeminiEmbedder,
+    "local": SentenceTransformerEmbedder,
+    "fake": FakeEmbedder,
+}
+
+
+def get_embedder(name, **options):
+    """Embedder instance by registry name ('gemini', 'local', 'fake')"""
+    try:
+        embedder_class = EMBEDDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedder '{name}'. Choose from: {', '.join(EMBEDDERS)}")
+    return embedder_class(**options)
+
+
+def embedder_for(name, **options):
+    """Embedder that produced an index, from the name recorded in its sidecar.
+
+    options only apply to the local provider (threads, onnx, quantize, batch_size).
+    """
+    if name.startswith("st:"):
+        return SentenceTransformerEmbedder(model=name[len("st:"):], **options)
+    if name.startswith("fake-"):
+        return FakeEmbedder(dim=int(name[len("fake-"):]))
+    return GeminiEmbedder(model=name)
@@ -0,0 +1,189 @@
+"""
+VAJRA Embedding Cache
+In-memory LRU of query embeddings with an optional on-disk spill
+that is shared by every worker process pointed at the same directory
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows - single process CLI use, no cross-process locking
+    fcntl = None
+
+
+def normalize_query(text):
+    """Normalize query text so trivially different spellings share a cache key"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class DiskEmbeddingStore:
+    """Append-only float32 matrix (memory-mapped) plus a key index, one row per key"""
+
+    def __init__(self, cache_dir, model, max_entries=100000):
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        self.dir = os.path.join(cache_dir, safe_model)
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, "embeddings.f32")
+        self.keys_path = os.path.join(self.dir, "keys.txt")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, ".lock")
+        self.max_entries = max_entries
+
+        self.dim = None
+        self.rows = {}
+        self._keys_size = -1
+        self._vectors = None
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        self._refresh()
+
+    def _refresh(self):
+        """Re-read the key index if another process has appended to it"""
+        if self.dim is None or not os.path.exists(self.keys_path):
+            return
+        keys_size = os.path.getsize(self.keys_path)
+        if keys_size == self._keys_size:
+            return
+
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            keys = f.read().splitlines()
+        row_bytes = self.dim * 4
+        n_rows = min(len(keys), os.path.getsize(self.vectors_path) // row_bytes)
+        self.rows = {key: row for row, key in enumerate(keys[:n_rows])}
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(n_rows, self.dim))
+            if n_rows else None
+        )
+        self._keys_size = keys_size
+
+    def get(self, key):
+        with self._lock:
+            if key not in self.rows:
+                self._refresh()
+            row = self.rows.get(key)
+            if row is None:
+                return None
+            return np.array(self._vectors[row])
+
+    def put(self, key, emb):
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(emb.shape[0])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+            if emb.shape[0] != self.dim or len(self.rows) >= self.max_entries:
+                return
+
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    if key in self.rows:
+                        return
+                    # Drop any vector written without its key (crash mid-append)
+                    with open(self.vectors_path, "ab") as f:
+                        f.truncate(len(self.rows) * self.dim * 4)
+                        f.write(np.ascontiguousarray(emb, dtype="float32").tobytes())
+                    with open(self.keys_path, "a", encoding="utf-8") as f:
+                        f.write(key + "\n")
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class EmbeddingCache:
+    """Query embedding cache keyed on normalized text + embedding model"""
+
+    def __init__(self, model, max_size=1024, cache_dir=None):
+        self.model = model
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.disk = DiskEmbeddingStore(cache_dir, model) if cache_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, text):
+        raw = f"{self.model}\n{normalize_query(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text):
+        """Return the cached embedding for text, or None"""
+        key = self.key(text)
+        with self._lock:
+            emb = self.memory.get(key)
+            if emb is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                METRICS.inc("vajra_cache_requests_total", cache="embedding", result="hit")
+                return emb
+
+        emb = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if emb is None:
+                self.misses += 1
+                METRICS.inc("vajra_cache_requests_total", cache="embedding", result="miss")
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            METRICS.inc("vajra_cache_requests_total", cache="embedding", result="disk_hit")
+            self._remember(key, emb)
+        return emb
+
+    def put(self, text, emb):
+        """Store an embedding in memory (and on disk when configured)"""
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, emb)
+        if self.disk is not None:
+            self.disk.put(key, emb)
+
+    async def aget(self, text):
+        """get() for the event loop - the disk store's file reads and lock run on a thread"""
+        if self.disk is None:
+            return self.get(text)
+        return await asyncio.to_thread(self.get, text)
+
+    async def aput(self, text, emb):
+        """put() for the event loop - the disk append runs on a thread"""
+        if self.disk is None:
+            return self.put(text, emb)
+        return await asyncio.to_thread(self.put, text, emb)
+
+    def _remember(self, key, emb):
+        self.memory[key] = emb
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        """Hit/miss counters and current sizes"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "max_size": self.max_size,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+        }
@@ -0,0 +1,118 @@
+"""
+VAJRA Generators
+Pluggable answer generators. Each returns {"text", "prompt_tokens", "output_tokens"}
+and streams the same shape chunk by chunk
+"""
+
+import asyncio
+import time
+
+from context_budget import estimate_tokens
+
+GENERATION_MODEL = "gemini-2.0-flash-lite"
+
+
+def _request_options(timeout):
+    return {"timeout": timeout} if timeout else None
+
+
+def _generation(text, response):
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "text": text,
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+class GeminiGenerator:
+    """Gemini model created once, with the static instructions as its system instruction"""
+
+    def __init__(self, model=GENERATION_MODEL, system_instruction=None, generation_config=None):
+        import google.generativeai as genai
+
+        self.name = model
+        self.model = genai.GenerativeModel(
+            model,
+            system_instruction=system_instruction,
+            generation_config=generation_config
+        )
+
+    def generate(self, prompt, timeout=None):
+        response = self.model.generate_content(prompt, request_options=_request_options(timeout))
+        return _generation(response.text, response)
+
+    async def agenerate(self, prompt, timeout=None):
+        response = await self.model.generate_content_async(prompt, request_options=_request_options(timeout))
+        return _generation(response.text, response)
+
+    def stream(self, prompt, timeout=None):
+        response = self.model.generate_content(prompt, stream=True, request_options=_request_options(timeout))
+        for chunk in response:
+            if chunk.text:
+                yield _generation(chunk.text, chunk)
+
+
+class FakeGenerator:
+    """Answers by listing the sections in the prompt's context (VAJRA_LLM_BACKEND=fake).
+
+    Waits a simulated latency first and streams the answer a few words at a
+    time, with running usage counts like Gemini's.
+    """
+
+    def __init__(self, latency=0.0, system_instruction=None, generation_config=None, words_per_chunk=8):
+        self.name = "fake"
+        self.latency = latency
+        self.system_instruction = system_instruction or ""
+        self.words_per_chunk = words_per_chunk
+
+    def answer(self, prompt):
+        sections = [line.split(":", 1)[0] for line in prompt.splitlines() if line.startswith("Section ")]
+        lines = ["Based on the retrieved provisions:"] + [f"- {section}" for section in sections] + [
+            "This is general information only. Please consult a qualified lawyer."
+        ]
+        return "\n".join(lines)
+
+    def _result(self, text, prompt):
+        return {
+            "text": text,
+            "prompt_tokens": estimate_tokens(self.system_instruction) + estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+        }
+
+    def generate(self, prompt, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(self.answer(prompt), prompt)
+
+    async def agenerate(self, prompt, timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(self.answer(prompt), prompt)
+
+    def stream(self, prompt, timeout=None):
+        words = self.answer(prompt).split(" ")
+        chunks = [" ".join(words[i:i + self.words_per_chunk]) for i in range(0, len(words), self.words_per_chunk)]
+        sent = ""
+        for n, chunk in enumerate(chunks):
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            chunk = chunk if n == len(chunks) - 1 else chunk + " "
+            sent += chunk
+            # Like Gemini's, the usage on each chunk is the running total
+            yield dict(self._result(chunk, prompt), output_tokens=estimate_tokens(sent))
+
+
+GENERATORS = {
+    "gemini": GeminiGenerator,
+    "fake": FakeGenerator,
+}
+
+
+def get_generator(name, **options):
+    """Generator instance by registry name ('gemini', 'fake')"""
+    try:
+        generator_class = GENERATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown generator '{name}'. Choose from: {', '.join(GENERATORS)}")
+    return generator_class(**options)
@@ -0,0 +1,89 @@
+"""
+VAJRA Index Factory
+FAISS index types VAJRA can build, and how their distances become a score
+that is comparable across acts
+"""
+
+import math
+
+import faiss
+import numpy as np
+
+# name -> (metric, description)
+INDEX_TYPES = {
+    "flat-l2": ("l2", "exact squared L2 (original format)"),
+    "flat-ip": ("ip", "exact cosine (inner product on normalized vectors)"),
+    "sq8": ("ip", "8-bit scalar quantization, cosine, ~4x smaller"),
+    "pq": ("ip", "product quantization, cosine, ~32x smaller"),
+    "hnsw": ("ip", "HNSW graph over full vectors, cosine"),
+    "ivf": ("ip", "inverted file over flat lists, cosine"),
+}
+
+DEFAULT_INDEX_TYPE = "flat-l2"
+
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 8
+PQ_SUBVECTOR_DIM = 8
+
+
+def index_metric(index_type):
+    return INDEX_TYPES[index_type][0]
+
+
+def normalize(vectors):
+    """Row-normalized float32 copy (cosine via inner product)"""
+    vectors = np.array(vectors, dtype="float32", copy=True).reshape(len(vectors), -1)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_index(index_type, vectors):
+    """Build, train and fill an index of the given type over the vectors"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from: {', '.join(INDEX_TYPES)}")
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, d = vectors.shape
+    if index_metric(index_type) == "ip":
+        vectors = normalize(vectors)
+    ip = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat-l2":
+        index = faiss.IndexFlatL2(d)
+    elif index_type == "flat-ip":
+        index = faiss.IndexFlatIP(d)
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit, ip)
+    elif index_type == "pq":
+        # 2^nbits centroids per sub-quantizer need at least that many training vectors
+        nbits = max(1, min(8, int(math.log2(n))))
+        index = faiss.IndexPQ(d, d // PQ_SUBVECTOR_DIM, nbits, ip)
+        # Small corpora are far below faiss' "enough training points" heuristic - expected here
+        index.pq.cp.min_points_per_centroid = 1
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, HNSW_M, ip)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:  # ivf
+        nlist = max(1, int(math.sqrt(n)))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(d), d, nlist, ip)
+        index.nprobe = min(IVF_NPROBE, nlist)
+        index.cp.min_points_per_centroid = 1
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def prepare_query(metric, q_emb):
+    """Query matrix for an index of this metric (normalized for cosine indices)"""
+    q_emb = np.asarray(q_emb, dtype="float32").reshape(-1, q_emb.shape[-1])
+    return normalize(q_emb) if metric == "ip" else q_emb
+
+
+def to_similarity(metric, distance):
+    """Cosine similarity from a FAISS distance, comparable across acts and index types.
+
+    Embeddings are unit length, so squared L2 distance d = 2 - 2 cos.
+    """
+    return float(distance) if metric == "ip" else 1.0 - float(distance) / 2.0
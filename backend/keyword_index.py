@@ -0,0 +1,122 @@
+"""
+VAJRA Keyword Index
+BM25 inverted index over every act's section numbers, titles, descriptions
+and examples, plus reciprocal-rank fusion with the vector search results
+"""
+
+import re
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or", "the", "to", "under",
+    "what", "when", "which", "who", "with",
+}
+
+# Title words count this many times over description/example words
+TITLE_WEIGHT = 2
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KeywordIndex:
+    """BM25 over every registered act, with per-posting weights precomputed at build time"""
+
+    def __init__(self, corpora, k1=1.5, b=0.75):
+        docs = []          # doc id -> (act, row)
+        act_ranges = {}    # act -> (first doc id, end doc id)
+        term_freqs = []
+        for act, corpus in corpora.items():
+            start = len(docs)
+            for row, entry in enumerate(corpus["entries"]):
+                tokens = tokenize(entry["section_number"]) + tokenize(entry["section_title"]) * TITLE_WEIGHT
+                tokens += tokenize(entry["description"])
+                for example in entry.get("examples") or []:
+                    tokens += tokenize(example)
+                tf = {}
+                for token in tokens:
+                    tf[token] = tf.get(token, 0) + 1
+                term_freqs.append((tf, len(tokens)))
+                docs.append((act, row))
+            act_ranges[act] = (start, len(docs))
+
+        n_docs = len(docs)
+        avg_len = sum(length for _, length in term_freqs) / max(n_docs, 1)
+        postings = {}
+        for doc_id, (tf, length) in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * length / avg_len)
+            for term, freq in tf.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc_id)
+                postings[term][1].append(freq * (k1 + 1) / (freq + norm))
+
+        terms, offsets, doc_ids, weights = [], [0], [], []
+        for term, (term_docs, term_weights) in postings.items():
+            idf = np.log(1 + (n_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            terms.append(term)
+            offsets.append(offsets[-1] + len(term_docs))
+            doc_ids.extend(term_docs)
+            weights.extend(w * idf for w in term_weights)
+        self._set(docs, act_ranges, terms, np.array(offsets, dtype="int64"),
+                  np.array(doc_ids, dtype="int64"), np.array(weights, dtype="float32"))
+
+    @classmethod
+    def from_postings(cls, docs, act_ranges, terms, offsets, doc_ids, weights):
+        """Index over postings compiled earlier (see arrays()) - no section is tokenized"""
+        index = cls.__new__(cls)
+        index._set(docs, act_ranges, terms, offsets, doc_ids, weights)
+        return index
+
+    def _set(self, docs, act_ranges, terms, offsets, doc_ids, weights):
+        self.docs = docs
+        self.act_ranges = act_ranges
+        # Postings of terms[i] are doc_ids / weights[offsets[i]:offsets[i + 1]]
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+
+    def arrays(self):
+        """(terms, offsets, doc ids, BM25 weights) - the postings in flat arrays"""
+        return list(self.terms), self.offsets, self.doc_ids, self.weights
+
+    def search(self, query, k=10, acts=None):
+        """Top-k (act, row, score) by BM25; empty when no query term is indexed"""
+        scores = np.zeros(len(self.docs), dtype="float32")
+        matched = False
+        for term in set(tokenize(query)):
+            i = self.terms.get(term)
+            if i is not None:
+                start, end = self.offsets[i], self.offsets[i + 1]
+                scores[self.doc_ids[start:end]] += self.weights[start:end]
+                matched = True
+        if not matched:
+            return []
+
+        if acts is not None:
+            mask = np.zeros(len(self.docs), dtype=bool)
+            for act in acts:
+                start, end = self.act_ranges.get(act, (0, 0))
+                mask[start:end] = True
+            scores[~mask] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(*self.docs[doc_id], float(scores[doc_id])) for doc_id in candidates]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge ranked key lists: score(key) = sum over rankings of 1 / (k + rank)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
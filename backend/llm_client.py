@@ -0,0 +1,148 @@
+"""
+VAJRA LLM Client
+One shared, resilient entry point to the embedding and generation backends:
+backend objects are created once and every call goes through a CallPolicy
+(per-call timeout, deadline, jittered retries, rate limit, circuit breaker),
+with optional hedging of slow generation calls
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from embedders import EMBED_MODEL, EMBEDDERS, embedder_for, get_embedder
+from generators import get_generator
+from resilience import CallPolicy, CircuitBreaker, ahedged_call, hedged_call
+
+# HTTP statuses worth retrying: timeouts, rate limiting, server-side failures
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient(error):
+    """Retry server/network failures, not bad requests, auth errors or blocked responses"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in TRANSIENT_STATUS
+    return not isinstance(error, (ValueError, TypeError, KeyError))
+
+
+class LLMClient:
+    """Embedding and generation calls with shared policies (one client per process)"""
+
+    def __init__(self, embedder, generator=None, embed_policy=None, generate_policy=None, hedge_after=0.0,
+                 hedge_threads=8):
+        self.embedder = embedder
+        self.generator = generator
+        self.embed_policy = embed_policy or CallPolicy(label="embedding", retry_if=is_transient)
+        self.generate_policy = generate_policy or CallPolicy(label="generation", retry_if=is_transient)
+        self.hedge_after = hedge_after   # seconds before a duplicate generation call is raced, 0 = off
+        # A hedged call holds up to two threads for its caller
+        self._hedge_pool = ThreadPoolExecutor(
+            max_workers=hedge_threads, thread_name_prefix="vajra-hedge"
+        ) if hedge_after else None
+
+    def embed(self, texts):
+        """float32 matrix, one row per text; raises once retries are exhausted"""
+        return np.asarray(self.embed_policy.call(
+            lambda timeout: self.embedder.embed(texts, timeout=timeout)
+        ), dtype="float32")
+
+    async def aembed(self, texts):
+        return np.asarray(await self.embed_policy.acall(
+            lambda timeout: self.embedder.aembed(texts, timeout=timeout)
+        ), dtype="float32")
+
+    def generate(self, prompt):
+        """{"text", "prompt_tokens", "output_tokens"}; raises once retries are exhausted"""
+        def call():
+            return self.generate_policy.call(lambda timeout: self.generator.generate(prompt, timeout=timeout))
+        if self.hedge_after:
+            return hedged_call(call, self.hedge_after, self._hedge_pool)
+        return call()
+
+    async def agenerate(self, prompt):
+        def call():
+            return self.generate_policy.acall(lambda timeout: self.generator.agenerate(prompt, timeout=timeout))
+        if self.hedge_after:
+            return await ahedged_call(call, self.hedge_after)
+        return await call()
+
+    def stream(self, prompt):
+        """Generation chunks as they arrive - retried only until the first chunk, never mid-answer"""
+        def start(timeout):
+            chunks = self.generator.stream(prompt, timeout=timeout)
+            return next(chunks, None), chunks
+
+        first, chunks = self.generate_policy.call(start)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    def shutdown(self):
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+
+
+def local_embed_options():
+    """Local embedder settings from VAJRA_EMBED_THREADS / VAJRA_EMBED_ONNX / VAJRA_EMBED_QUANTIZE"""
+    return {
+        "threads": int(os.getenv("VAJRA_EMBED_THREADS", "0")),
+        "onnx": os.getenv("VAJRA_EMBED_ONNX", "0") == "1",
+        "quantize": os.getenv("VAJRA_EMBED_QUANTIZE", "0") == "1",
+    }
+
+
+def make_embedder(backend="gemini", index_embedder=None, latency=0.0):
+    """Query embedder: VAJRA_EMBEDDER when set (a registry name or a recorded
+    embedder name), the fake one on the fake backend, else whatever built the indices"""
+    name = os.getenv("VAJRA_EMBEDDER") or ("fake" if backend == "fake" else index_embedder or EMBED_MODEL)
+    if name in EMBEDDERS:
+        options = {"local": local_embed_options(), "fake": {"latency": latency}}.get(name, {})
+        return get_embedder(name, **options)
+    return embedder_for(name, **(local_embed_options() if name.startswith("st:") else {}))
+
+
+def make_client(system_instruction=None, generation_config=None, index_embedder=None, embedder=None):
+    """LLMClient configured from the environment (VAJRA_LLM_BACKEND=gemini|fake and friends).
+
+    index_embedder is the embedder name recorded with the indices; pass embedder
+    to keep an already loaded one (a forked worker keeps its parent's model).
+    """
+    backend = os.getenv("VAJRA_LLM_BACKEND", "gemini")
+    retries = int(os.getenv("VAJRA_LLM_RETRIES", "3"))
+    failures = int(os.getenv("VAJRA_BREAKER_FAILURES", "5"))
+    reset = float(os.getenv("VAJRA_BREAKER_RESET", "30"))
+
+    options = {}
+    if backend == "fake":
+        options["latency"] = float(os.getenv("VAJRA_FAKE_LATENCY_MS", "0")) / 1000.0
+    if embedder is None:
+        embedder = make_embedder(backend, index_embedder, **options)
+    generator = get_generator(
+        backend, system_instruction=system_instruction, generation_config=generation_config, **options
+    )
+
+    embed_policy = CallPolicy(
+        timeout=float(os.getenv("VAJRA_EMBED_TIMEOUT", "10")),
+        attempts=retries,
+        rate=float(os.getenv("VAJRA_EMBED_RATE", "0")),
+        breaker=CircuitBreaker(failures, reset),
+        retry_if=is_transient,
+        label="embedding"
+    )
+    generate_policy = CallPolicy(
+        timeout=float(os.getenv("VAJRA_LLM_TIMEOUT", "30")),
+        deadline=float(os.getenv("VAJRA_LLM_DEADLINE", "0")) or None,
+        attempts=retries,
+        rate=float(os.getenv("VAJRA_LLM_RATE", "0")),
+        breaker=CircuitBreaker(failures, reset),
+        retry_if=is_transient,
+        label="generation"
+    )
+    return LLMClient(
+        embedder, generator, embed_policy, generate_policy,
+        hedge_after=float(os.getenv("VAJRA_HEDGE_MS", "0")) / 1000.0,
+        hedge_threads=int(os.getenv("VAJRA_HEDGE_THREADS", "0")) or 2 * int(os.getenv("VAJRA_WORKER_THREADS", "4"))
+    )
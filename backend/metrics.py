@@ -0,0 +1,184 @@
+"""
+VAJRA Metrics
+In-process counters, gauges and histograms for the RAG pipeline, rendered
+in the Prometheus text format. Every call is a no-op when disabled
+(VAJRA_METRICS=0)
+"""
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+
+# Seconds - from a sub-millisecond FAISS search to a slow Gemini call
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Characters of prompt / answer text
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+# Prompt / output tokens reported by Gemini
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+# Questions per retrieval batch
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+HELP = {
+    "vajra_stage_seconds": "Time spent in each pipeline stage",
+    "vajra_stage_errors_total": "Pipeline stage failures",
+    "vajra_cache_requests_total": "Cache lookups by cache and result",
+    "vajra_answers_total": "Answers by how they were produced",
+    "vajra_prompt_chars": "Size of the prompt sent to the LLM",
+    "vajra_response_chars": "Size of the generated answer",
+    "vajra_prompt_tokens": "Prompt tokens billed per generation, system instruction included",
+    "vajra_output_tokens": "Output tokens billed per generation",
+    "vajra_batch_size": "Questions per retrieval batch",
+    "vajra_rerank_total": "Re-ranking passes by result (ok, or fallback to vector order over budget)",
+    "vajra_corpus_load_seconds": "Time to load corpora and indices at startup",
+    "vajra_corpus_sections": "Sections loaded per act",
+    "vajra_corpus_version": "Corpus version being served (bumped by every hot reload)",
+    "vajra_corpus_reloads_total": "Corpus hot reloads by result",
+    "vajra_session_evictions_total": "Conversation sessions evicted to stay under the session caps",
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the last bucket bound for +Inf)"""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled=True, keep_samples=0):
+        self.enabled = enabled
+        self.keep_samples = keep_samples   # raw observations kept per histogram (benchmarks), 0 = none
+        self.counters = {}     # (name, labels) -> value
+        self.gauges = {}       # (name, labels) -> value
+        self.histograms = {}   # (name, labels) -> Histogram
+        self.samples = {}      # (name, labels) -> deque of raw observations
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+            if self.keep_samples:
+                samples = self.samples.get(key)
+                if samples is None:
+                    samples = self.samples[key] = deque(maxlen=self.keep_samples)
+                samples.append(value)
+
+    def stage(self, stage, **labels):
+        """Context manager timing one pipeline stage; failures are counted and re-raised"""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(stage, labels)
+
+    @contextlib.contextmanager
+    def _timed(self, stage, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("vajra_stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("vajra_stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            lines, typed = [], set()
+
+            def header(name, kind):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} {kind}")
+
+            for (name, labels), value in counters:
+                header(name, "counter")
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), value in gauges:
+                header(name, "gauge")
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                header(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self):
+        """[(stage label text, count, mean s, p50 s, p95 s, errors)] for every timed stage"""
+        with self._lock:
+            rows = []
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if name != "vajra_stage_seconds":
+                    continue
+                errors = self.counters.get(("vajra_stage_errors_total", labels), 0)
+                labels = dict(labels)
+                label = " ".join([labels.pop("stage")] + [str(v) for v in labels.values()])
+                rows.append((
+                    label, histogram.count, histogram.sum / histogram.count,
+                    histogram.quantile(0.5), histogram.quantile(0.95), errors
+                ))
+            return sorted(rows)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.samples.clear()
+
+
+METRICS = Metrics(enabled=os.getenv("VAJRA_METRICS", "1") != "0")
@@ -0,0 +1,167 @@
+"""
+VAJRA Deferred Replies
+Bounded work queue + worker pool that answers WhatsApp messages out of band
+and delivers them through the Twilio REST messages API
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+from metrics import METRICS
+
+# Twilio rejects WhatsApp message bodies longer than this
+MAX_MESSAGE_LENGTH = 1600
+
+# Tells a worker to exit - no sender can compare equal to it
+_STOP = object()
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """Split a reply into Twilio-sized chunks, preferring line breaks"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class RecordedMessages:
+    def __init__(self):
+        self.sent = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, body, from_, to):
+        with self._lock:
+            message = {"sid": f"SM{next(self._ids):032d}", "body": body, "from_": from_, "to": to}
+            self.sent.append(message)
+        return message
+
+
+class RecordingTwilioClient:
+    """Local stand-in for twilio.rest.Client that records outbound messages"""
+
+    def __init__(self):
+        self.messages = RecordedMessages()
+
+    @property
+    def sent(self):
+        return self.messages.sent
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class DeferredReplyQueue:
+    """Answers queued messages on a worker pool, in order for each sender.
+
+    handler(body, sender) returns the reply text.
+    """
+
+    def __init__(self, handler, client, max_depth=100, workers=4):
+        self.handler = handler
+        self.client = client
+        self.max_depth = max_depth
+
+        self.pending = {}            # sender -> deque of jobs, one worker per sender at a time
+        self.ready = queue.Queue()   # senders with work and no worker on them
+        self.depth = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=1000)
+        self.total_times = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+        self.workers = [
+            threading.Thread(target=self._work, name=f"vajra-reply-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, sender, recipient, body):
+        """Queue a message; False when the queue is full (caller should push back)"""
+        with self._lock:
+            if self.depth >= self.max_depth:
+                self.rejected += 1
+                return False
+            self.depth += 1
+            self.submitted += 1
+            job = (sender, recipient, body, time.monotonic())
+            if sender in self.pending:
+                self.pending[sender].append(job)
+            else:
+                self.pending[sender] = deque([job])
+                self.ready.put(sender)
+        return True
+
+    def _work(self):
+        while True:
+            sender = self.ready.get()
+            if sender is _STOP:
+                return
+            with self._lock:
+                _, recipient, body, queued_at = self.pending[sender].popleft()
+            started = time.monotonic()
+
+            try:
+                reply_text = self.handler(body, sender)
+                with METRICS.stage("twilio_send"):
+                    for chunk in split_message(reply_text):
+                        self.client.messages.create(body=chunk, from_=recipient, to=sender)
+                ok = True
+            except Exception as e:
+                print(f"❌ Deferred reply to {sender} failed: {e}")
+                ok = False
+
+            with self._lock:
+                self.depth -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self.wait_times.append(started - queued_at)
+                METRICS.observe("vajra_stage_seconds", started - queued_at, stage="queue_wait")
+                self.total_times.append(time.monotonic() - queued_at)
+                # Hand the sender back only once this message is out - keeps replies in order
+                if self.pending[sender]:
+                    self.ready.put(sender)
+                else:
+                    del self.pending[sender]
+
+    def stats(self):
+        """Queue depth, throughput counters and latency percentiles (seconds)"""
+        with self._lock:
+            wait_times = list(self.wait_times)
+            total_times = list(self.total_times)
+            return {
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "active_senders": len(self.pending),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_p50": percentile(wait_times, 50),
+                "wait_p95": percentile(wait_times, 95),
+                "latency_p50": percentile(total_times, 50),
+                "latency_p95": percentile(total_times, 95),
+            }
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.ready.put(_STOP)
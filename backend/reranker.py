@@ -0,0 +1,180 @@
+"""
+VAJRA Re-ranker
+Scores (question, section) pairs with a local cross-encoder over a wide
+vector-search candidate pool and keeps the best few for the prompt. Runs in
+CPU batches under a latency budget - over budget, the candidates keep their
+vector order - and caches pair scores for repeated questions
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from context_budget import format_section, section_score
+from embedding_cache import normalize_query
+from keyword_index import tokenize
+from metrics import METRICS
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderModel:
+    """sentence-transformers CrossEncoder on the CPU; predict(pairs) -> relevance scores,
+    one call at a time like the local embedder"""
+
+    def __init__(self, model=RERANK_MODEL, threads=0):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("The cross-encoder re-ranker needs sentence-transformers: "
+                              "pip install sentence-transformers") from None
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        self.name = model
+        self.model = CrossEncoder(model, device="cpu")
+        self._lock = threading.Lock()
+
+    def predict(self, pairs, batch_size=16):
+        with self._lock:
+            return [float(score) for score in self.model.predict(
+                pairs, batch_size=batch_size, show_progress_bar=False
+            )]
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the share of the question's words found in the section (VAJRA_RERANKER=fake)"""
+
+    def __init__(self, latency=0.0):
+        self.name = "fake"
+        self.latency = latency   # simulated seconds per pair
+
+    def predict(self, pairs, batch_size=16):
+        if self.latency:
+            time.sleep(self.latency * len(pairs))
+        scores = []
+        for question, text in pairs:
+            words, section = set(tokenize(question)), set(tokenize(text))
+            scores.append(len(words & section) / len(words) if words else 0.0)
+        return scores
+
+
+RERANKERS = {
+    "cross-encoder": CrossEncoderModel,
+    "fake": FakeCrossEncoder,
+}
+
+
+class Reranker:
+    """Batched cross-encoder re-ranking with a pair-score LRU and a latency budget"""
+
+    def __init__(self, model, candidates=30, top_n=5, budget_ms=200.0, batch_size=16, cache_size=4096):
+        self.model = model
+        self.candidates = candidates   # sections retrieved for re-ranking
+        self.top_n = top_n             # sections kept for the prompt
+        self.budget = budget_ms / 1000.0
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()     # (corpus version, question, act, section number) -> score
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def rerank(self, query, results, version=None):
+        """Best top_n of results by cross-encoder score, or the top_n in vector order when over budget.
+
+        version is the corpus version the results come from - scores are cached per version.
+        """
+        if not results:
+            return results
+        deadline = time.perf_counter() + self.budget
+        question = normalize_query(query)
+        keys = [(version, question, c['act'], c['section_number']) for c in results]
+
+        with METRICS.stage("rerank"):
+            scores = self._cached(keys)
+            missing = [i for i, score in enumerate(scores) if score is None]
+            for start in range(0, len(missing), self.batch_size):
+                if start and time.perf_counter() > deadline:
+                    # Candidates keep their vector order; the scores so far stay cached
+                    self.fallbacks += 1
+                    METRICS.inc("vajra_rerank_total", result="fallback")
+                    print(f"⏱️ Re-ranking over its {self.budget * 1000:.0f}ms budget, keeping vector order")
+                    return sorted(results, key=section_score, reverse=True)[:self.top_n]
+                batch = missing[start:start + self.batch_size]
+                batch_scores = self.model.predict(
+                    [(query, format_section(results[i])) for i in batch], batch_size=self.batch_size
+                )
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = score
+                self._store([keys[i] for i in batch], batch_scores)
+
+        METRICS.inc("vajra_rerank_total", result="ok")
+        ranked = sorted(zip(scores, range(len(results))), key=lambda pair: -pair[0])
+        return [dict(results[i], rerank_score=score) for score, i in ranked[:self.top_n]]
+
+    def _cached(self, keys):
+        scores = []
+        with self._lock:
+            for key in keys:
+                score = self.cache.get(key)
+                if score is not None:
+                    self.cache.move_to_end(key)
+                scores.append(score)
+            hits = sum(score is not None for score in scores)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        METRICS.inc("vajra_cache_requests_total", hits, cache="rerank", result="hit")
+        METRICS.inc("vajra_cache_requests_total", len(keys) - hits, cache="rerank", result="miss")
+        return scores
+
+    def _store(self, keys, scores):
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self.cache[key] = score
+                self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def clear(self):
+        """Forget every pair score (the sections changed)"""
+        with self._lock:
+            self.cache.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.cache),
+                "fallbacks": self.fallbacks,
+            }
+
+
+def make_reranker():
+    """Re-ranker from the environment (VAJRA_RERANKER=cross-encoder|fake), or None when unset"""
+    name = os.getenv("VAJRA_RERANKER")
+    if not name:
+        return None
+    try:
+        model_class = RERANKERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown re-ranker '{name}'. Choose from: {', '.join(RERANKERS)}")
+    options = {} if name == "fake" else {
+        "model": os.getenv("VAJRA_RERANK_MODEL", RERANK_MODEL),
+        "threads": int(os.getenv("VAJRA_RERANK_THREADS", "0")),
+    }
+    return Reranker(
+        model_class(**options),
+        candidates=int(os.getenv("VAJRA_RERANK_CANDIDATES", "30")),
+        top_n=int(os.getenv("VAJRA_RERANK_TOP", "5")),
+        budget_ms=float(os.getenv("VAJRA_RERANK_BUDGET_MS", "200")),
+        batch_size=int(os.getenv("VAJRA_RERANK_BATCH", "16")),
+        cache_size=int(os.getenv("VAJRA_RERANK_CACHE_SIZE", "4096"))
+    )
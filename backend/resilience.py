@@ -0,0 +1,229 @@
+"""
+VAJRA Resilience helpers
+Rate limiting, retries with jittered exponential backoff, per-call deadlines,
+a circuit breaker and hedged calls for remote API calls
+"""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while its circuit breaker is open"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The overall deadline for a call (all attempts included) ran out"""
+
+
+class RateLimiter:
+    """Token bucket shared by every thread calling the same API quota"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate                      # calls per second, 0 = unlimited
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures, then lets one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold   # 0 = never open
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now; True when it is the trial call"""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial:
+                raise CircuitOpenError("circuit open after repeated failures")
+            self._trial = True
+            return True
+
+    def release_trial(self):
+        """The trial call ended without a verdict (cancelled) - let the next call be the trial"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failure_threshold and (self.opened_at is not None or self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+
+
+class CallPolicy:
+    """How one remote API is called: per-attempt timeout, overall deadline,
+    jittered retries, a shared rate limit and a circuit breaker.
+
+    fn is called as fn(timeout) so the timeout reaches the underlying client.
+    """
+
+    def __init__(self, timeout=30.0, deadline=None, attempts=3, base_delay=0.5, max_delay=10.0,
+                 rate=0, breaker=None, retry_if=None, label="call"):
+        self.timeout = timeout
+        self.deadline = deadline           # seconds for all attempts together, None = attempts * timeout
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = RateLimiter(rate)
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_if = retry_if or (lambda e: True)
+        self.label = label
+
+    def _attempt_timeout(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.label} deadline exceeded")
+        return min(self.timeout, remaining) if self.timeout else remaining
+
+    def _backoff(self, attempt, error, deadline):
+        """Delay before the next attempt, or None when the error should be raised"""
+        if attempt == self.attempts or isinstance(error, CircuitOpenError) or not self.retry_if(error):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if time.monotonic() + delay >= deadline:
+            return None
+        print(f"⚠️ {self.label} failed ({error}), retry {attempt}/{self.attempts - 1} in {delay:.1f}s")
+        return delay
+
+    def _record_error(self, error):
+        """Only transient errors count against the breaker - a rejected request
+        still means the API is up"""
+        if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+            return
+        if self.retry_if(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _start(self):
+        budget = self.deadline or (self.timeout or 60.0) * self.attempts
+        return time.monotonic() + budget
+
+    def call(self, fn):
+        deadline = self._start()
+        for attempt in range(1, self.attempts + 1):
+            trial = False
+            try:
+                timeout = self._attempt_timeout(deadline)
+                trial = self.breaker.before_call()
+                self.limiter.acquire()
+                result = fn(timeout)
+            except Exception as e:
+                self._record_error(e)
+                delay = self._backoff(attempt, e, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            except BaseException:
+                # Interrupted: says nothing about the API, but must not hold the trial forever
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def acall(self, fn):
+        """call() for coroutine functions; the timeout is also enforced with asyncio.wait_for"""
+        deadline = self._start()
+        for attempt in range(1, self.attempts + 1):
+            trial = False
+            try:
+                timeout = self._attempt_timeout(deadline)
+                trial = self.breaker.before_call()
+                if self.limiter.rate:
+                    await asyncio.get_running_loop().run_in_executor(None, self.limiter.acquire)
+                result = await asyncio.wait_for(fn(timeout), timeout)
+            except Exception as e:
+                self._record_error(e)
+                delay = self._backoff(attempt, e, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled (e.g. the losing copy of a hedged call): no verdict on the API
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+
+def hedged_call(fn, hedge_after, executor):
+    """Run fn(); if it has not finished after hedge_after seconds, race a second
+    copy and return whichever succeeds first (trading cost for tail latency)"""
+    first = executor.submit(fn)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+    pending = {first, executor.submit(fn)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def ahedged_call(fn, hedge_after):
+    """hedged_call for a coroutine function"""
+    first = asyncio.ensure_future(fn())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+    pending = {first, asyncio.ensure_future(fn())}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
@@ -0,0 +1,146 @@
+"""
+VAJRA Response Cache
+Semantic answer cache: a near-duplicate question that retrieved the same
+sections gets the stored answer back without another LLM call
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import METRICS
+
+
+def corpus_fingerprint(paths):
+    """(path, mtime, size) of every corpus file - changes whenever the data is rebuilt"""
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint.append((path, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class ResponseCache:
+    """Answers keyed on (query embedding, retrieved section set) with TTL + LRU eviction.
+
+    Entries are tagged with the corpus version they were answered from; lookups
+    and stores from any version but the live one are ignored, so a request that
+    outlives a reload can neither read nor leave behind an answer from old sections.
+    """
+
+    def __init__(self, max_distance=0.05, max_size=512, ttl=3600, watch_paths=(), check_interval=5.0, version=None):
+        self.max_distance = max_distance
+        self.max_size = max_size
+        self.ttl = ttl
+        self.watch_paths = list(watch_paths)
+        self.check_interval = check_interval
+        self.version = version   # live corpus version
+
+        self.entries = OrderedDict()
+        self.by_sections = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._fingerprint = corpus_fingerprint(self.watch_paths)
+        self._last_check = time.monotonic()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def lookup(self, q_emb, section_ids, version=None):
+        """Return a cached answer for a near-duplicate question, or None"""
+        if not self.enabled:
+            return None
+        q_unit = _unit(q_emb)
+        sections = frozenset(section_ids)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_corpus(now)
+            best_id, best_distance = None, self.max_distance
+            candidates = self.by_sections.get(sections, ()) if version == self.version else ()
+            for entry_id in list(candidates):
+                emb, _, answer, created, entry_version = self.entries[entry_id]
+                if now - created > self.ttl or entry_version != self.version:
+                    self._evict(entry_id)
+                    continue
+                distance = 1.0 - float(np.dot(q_unit, emb))
+                if distance <= best_distance:
+                    best_id, best_distance = entry_id, distance
+
+            if best_id is None:
+                self.misses += 1
+                METRICS.inc("vajra_cache_requests_total", cache="response", result="miss")
+                return None
+            self.entries.move_to_end(best_id)
+            self.hits += 1
+            METRICS.inc("vajra_cache_requests_total", cache="response", result="hit")
+            return self.entries[best_id][2]
+
+    def store(self, q_emb, section_ids, answer, version=None):
+        """Remember the answer generated for this question and section set"""
+        if not self.enabled:
+            return
+        sections = frozenset(section_ids)
+        with self._lock:
+            if version != self.version:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self.entries[entry_id] = (_unit(q_emb), sections, answer, time.monotonic(), version)
+            self.by_sections.setdefault(sections, set()).add(entry_id)
+            while len(self.entries) > self.max_size:
+                self._evict(next(iter(self.entries)))
+
+    def clear(self, version=None):
+        """Drop every answer; version, when given, becomes the live corpus version"""
+        with self._lock:
+            self.entries.clear()
+            self.by_sections.clear()
+            if version is not None:
+                self.version = version
+
+    def _evict(self, entry_id):
+        sections = self.entries.pop(entry_id)[1]
+        ids = self.by_sections[sections]
+        ids.discard(entry_id)
+        if not ids:
+            del self.by_sections[sections]
+
+    def _check_corpus(self, now):
+        """Drop every answer once the corpus JSON/index files change on disk"""
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        fingerprint = corpus_fingerprint(self.watch_paths)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self.entries.clear()
+            self.by_sections.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "max_size": self.max_size,
+            "invalidations": self.invalidations,
+        }
+
+
+def _unit(emb):
+    emb = np.asarray(emb, dtype="float32").ravel()
+    norm = np.linalg.norm(emb)
+    return emb / norm if norm else emb
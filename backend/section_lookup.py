@@ -0,0 +1,128 @@
+"""
+VAJRA Section Lookup
+Direct (act, section number) -> section index and a parser for section
+references in questions, so "what is BNS section 318" or "u/s 35 BNSS"
+is answered from the referenced sections without an embedding call
+"""
+
+import json
+import os
+import re
+
+from corpora import DATA_DIR
+
+# Optional old-code -> new-act correspondence, e.g. {"IPC": {"420": ["BNS", "318"]}}
+CORRESPONDENCE_FILE = os.path.join(DATA_DIR, "section_correspondence.json")
+
+ACT_ALIASES = {
+    "BNS": ["bns", "bharatiya nyaya sanhita", "nyaya sanhita"],
+    "BSA": ["bsa", "bharatiya sakshya adhiniyam", "sakshya adhiniyam"],
+    "BNSS": ["bnss", "bharatiya nagarik suraksha sanhita", "nagarik suraksha sanhita"],
+    # Repealed codes - their numbers only resolve through the correspondence table
+    "IPC": ["ipc", "indian penal code"],
+    "CRPC": ["crpc", "cr.p.c.", "cr.p.c", "code of criminal procedure"],
+    "IEA": ["iea", "indian evidence act", "evidence act"],
+}
+
+_ALIAS_TO_ACT = {alias: act for act, aliases in ACT_ALIASES.items() for alias in aliases}
+_ACT_RE = "|".join(re.escape(alias) for alias in sorted(_ALIAS_TO_ACT, key=len, reverse=True))
+_NUM = r"\d{1,3}[a-z]?(?:\(\d+\))?"
+_NUMLIST = rf"{_NUM}(?:\s*(?:,|and|&|/)\s*{_NUM})*"
+_MARKER = r"(?:under\s+section|sections?|secs?\.?|ss?\.|§§?|u/s\.?|dhara|dhaara)"
+
+# "BNS 318", "BNS section 318", "BNSS s. 35 and 36"
+ACT_FIRST = re.compile(rf"(?<![a-z])(?P<act>{_ACT_RE})\s*(?:{_MARKER}\s*)?(?P<nums>{_NUMLIST})(?![\d\w])")
+# "section 318 of BNS", "u/s 35 BNSS"
+NUMBER_FIRST = re.compile(rf"(?<![a-z]){_MARKER}\s*(?P<nums>{_NUMLIST})\s*(?:of\s+)?(?:the\s+)?(?P<act>{_ACT_RE})(?![a-z])")
+# "what is 498A IPC", "35 bnss?" - without a marker only when the act ends the clause,
+# so counts like "list 5 BNS offences" are not read as citations
+NUMBER_ACT = re.compile(rf"(?<![\w.(/-])(?P<nums>{_NUMLIST})\s+(?P<act>{_ACT_RE})(?=\s*(?:[?!.,;:]|$))")
+# "section 318" - the act has to come from elsewhere in the question
+NUMBER_ONLY = re.compile(rf"(?<![a-z]){_MARKER}\s*(?P<nums>{_NUMLIST})(?![\d\w])")
+ACT_MENTION = re.compile(rf"(?<![a-z])(?:{_ACT_RE})(?![a-z])")
+
+
+def normalize_number(section_number):
+    """'Section 115(2)' / '115' / 'section 498a' -> '115' / '115' / '498A'"""
+    match = re.search(r"\d+[a-z]?", section_number.lower())
+    return match.group(0).upper() if match else section_number.strip().upper()
+
+
+def parse_section_refs(query):
+    """[(act, number)] referenced in the query, in order, without duplicates"""
+    text = query.lower()
+    found, taken = [], []
+
+    def add(act, nums, span):
+        taken.append(span)
+        found.extend((span[0], i, (act, normalize_number(num))) for i, num in enumerate(re.findall(_NUM, nums)))
+
+    for pattern in (ACT_FIRST, NUMBER_FIRST, NUMBER_ACT):
+        for m in pattern.finditer(text):
+            if not any(start <= m.start() < end for start, end in taken):
+                add(_ALIAS_TO_ACT[m.group("act")], m.group("nums"), m.span())
+
+    # Bare "section N" - the act named last before it ("In BNS, section 4"),
+    # else the only act the question names
+    mentions = [(m.start(), _ALIAS_TO_ACT[m.group(0)]) for m in ACT_MENTION.finditer(text)]
+    only = {act for _, act in mentions}
+    for m in NUMBER_ONLY.finditer(text):
+        if any(start <= m.start() < end for start, end in taken):
+            continue
+        before = [act for start, act in mentions if start < m.start()]
+        if before:
+            add(before[-1], m.group("nums"), m.span())
+        elif len(only) == 1:
+            add(next(iter(only)), m.group("nums"), m.span())
+
+    refs = []
+    for _, _, ref in sorted(found):
+        if ref not in refs:
+            refs.append(ref)
+    return refs
+
+
+def section_numbers(corpora):
+    """act -> normalized section number of every row"""
+    return {act: [normalize_number(entry["section_number"]) for entry in corpus["entries"]]
+            for act, corpus in corpora.items()}
+
+
+class SectionLookup:
+    """(act, section number) -> row, built from the section_number fields at load time
+    (or from numbers already normalized by section_numbers(), e.g. in the snapshot)"""
+
+    def __init__(self, corpora, correspondence_file=CORRESPONDENCE_FILE, numbers=None):
+        if numbers is None:
+            numbers = section_numbers(corpora)
+        self.table = {}
+        for act in corpora:
+            for row, number in enumerate(numbers[act]):
+                self.table.setdefault((act, number), row)
+
+        self.correspondence = {}
+        if correspondence_file and os.path.exists(correspondence_file):
+            with open(correspondence_file, "r", encoding="utf-8") as f:
+                for old_act, sections in json.load(f).items():
+                    for old_num, (act, num) in sections.items():
+                        self.correspondence[(old_act.upper(), normalize_number(old_num))] = (act, normalize_number(num))
+
+    def row(self, act, section_number):
+        """Row of a section by act and number ("BNS", "Section 303"), or None"""
+        return self.table.get((act, normalize_number(section_number)))
+
+    def resolve(self, query):
+        """([(act, row)] for the referenced sections that exist, [(act, number)] of those that don't)"""
+        hits, missing = [], []
+        for ref in parse_section_refs(query):
+            ref = self.correspondence.get(ref, ref)
+            row = self.table.get(ref)
+            if row is None:
+                missing.append(ref)
+            elif (ref[0], row) not in hits:
+                hits.append((ref[0], row))
+        return hits, missing
+
+    def find(self, query):
+        """[(act, row)] for every section the query references that exists in the corpus"""
+        return self.resolve(query)[0]
@@ -0,0 +1,223 @@
+"""
+VAJRA Sessions
+Per-sender conversation state for WhatsApp follow-ups: the last few turns and
+the sections behind the last answer, with LRU + idle-TTL eviction under a
+hard size cap. Kept in memory (per process) or in a SQLite file shared by
+every worker on the host
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import METRICS
+
+# Answers are cut to this many characters in the prompt's history block
+HISTORY_ANSWER_CHARS = 300
+
+# Openers that only make sense against the previous answer. Kept strict: a
+# false positive answers a new question from the last answer's sections, and
+# "what if ..." / "how about ..." open new questions as often as follow-ups
+FOLLOW_UP_START = re.compile(r"^(?:and|also|what about)\b")
+FOLLOW_UP_MAX_WORDS = 8
+
+
+def is_follow_up(question):
+    """Very short question opening on the previous answer ("and what about bail for that?")"""
+    text = question.lower().strip()
+    return len(text.split()) <= FOLLOW_UP_MAX_WORDS and bool(FOLLOW_UP_START.match(text))
+
+
+def format_history(session):
+    """Compact history block for the prompt: questions in full, answers truncated"""
+    lines = []
+    for question, answer in session["turns"]:
+        answer = " ".join(answer.split())
+        if len(answer) > HISTORY_ANSWER_CHARS:
+            answer = answer[:HISTORY_ANSWER_CHARS].rsplit(" ", 1)[0] + " ..."
+        lines.append(f"User: {question}\nVAJRA: {answer}")
+    return "\n".join(lines)
+
+
+def new_session():
+    return {"turns": [], "sections": []}
+
+
+class SessionStore:
+    """Shared turn bookkeeping; backends implement get / put / delete / stats"""
+
+    def __init__(self, max_turns=3, ttl=1800):
+        self.max_turns = max_turns
+        self.ttl = ttl
+
+    def record(self, sender, question, answer, section_ids=None):
+        """Append a turn (keeping the last max_turns) and remember the sections behind it"""
+        session = self.get(sender) or new_session()
+        session["turns"] = (session["turns"] + [[question, answer]])[-self.max_turns:]
+        if section_ids:
+            session["sections"] = [list(section_id) for section_id in section_ids]
+        self.put(sender, session)
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in this process - LRU order, idle TTL, at most max_sessions and max_bytes"""
+
+    def __init__(self, max_turns=3, ttl=1800, max_sessions=10000, max_bytes=16 * 1024 * 1024):
+        super().__init__(max_turns, ttl)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sessions = OrderedDict()   # sender -> (session as UTF-8 JSON, last used)
+        self.bytes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, sender):
+        now = time.monotonic()
+        with self._lock:
+            item = self.sessions.get(sender)
+            if item is None:
+                return None
+            if now - item[1] > self.ttl:
+                self._drop(sender)
+                return None
+            self.sessions.move_to_end(sender)
+            return json.loads(item[0])
+
+    def put(self, sender, session):
+        # Stored as UTF-8 bytes: a copy callers can't mutate, and its size in bytes
+        # (Devanagari takes three bytes a character)
+        data = json.dumps(session, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            if sender in self.sessions:
+                self._drop(sender)
+            self.sessions[sender] = (data, time.monotonic())
+            self.bytes += len(data)
+            while self.sessions and (len(self.sessions) > self.max_sessions or self.bytes > self.max_bytes):
+                self._drop(next(iter(self.sessions)))
+                self.evictions += 1
+                METRICS.inc("vajra_session_evictions_total", store="memory")
+
+    def delete(self, sender):
+        with self._lock:
+            if sender in self.sessions:
+                self._drop(sender)
+
+    def _drop(self, sender):
+        data, _ = self.sessions.pop(sender)
+        self.bytes -= len(data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a SQLite file, so a sender's follow-up can land on any worker.
+
+    One connection per thread and process (connections don't survive a fork);
+    expired and over-cap rows are pruned on write.
+    """
+
+    def __init__(self, path, max_turns=3, ttl=1800, max_sessions=10000, max_bytes=16 * 1024 * 1024):
+        super().__init__(max_turns, ttl)
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "sender TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_used ON sessions (used)")
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def get(self, sender):
+        # Wall clock - every worker process has to agree on it
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT data, used FROM sessions WHERE sender = ?", (sender,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                db.execute("DELETE FROM sessions WHERE sender = ?", (sender,))
+                return None
+            db.execute("UPDATE sessions SET used = ? WHERE sender = ?", (now, sender))
+        return json.loads(row[0])
+
+    def put(self, sender, session):
+        data = json.dumps(session, ensure_ascii=False)
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (sender, data, size, used) VALUES (?, ?, ?, ?)",
+                (sender, data, len(data.encode("utf-8")), now)
+            )
+            db.execute("DELETE FROM sessions WHERE used < ?", (now - self.ttl,))
+            self._enforce_caps(db)
+
+    def _enforce_caps(self, db):
+        """Drop least recently used sessions until both caps hold"""
+        count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        if count <= self.max_sessions and size <= self.max_bytes:
+            return
+        evicted = 0
+        for sender, row_size in db.execute("SELECT sender, size FROM sessions ORDER BY used").fetchall():
+            if count <= self.max_sessions and size <= self.max_bytes:
+                break
+            db.execute("DELETE FROM sessions WHERE sender = ?", (sender,))
+            count, size, evicted = count - 1, size - row_size, evicted + 1
+        self.evictions += evicted
+        METRICS.inc("vajra_session_evictions_total", evicted, store="sqlite")
+
+    def delete(self, sender):
+        with self._connect() as db:
+            db.execute("DELETE FROM sessions WHERE sender = ?", (sender,))
+
+    def stats(self):
+        with self._connect() as db:
+            count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        return {
+            "sessions": count,
+            "max_sessions": self.max_sessions,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+def make_session_store():
+    """Session store from the environment (VAJRA_SESSIONS=memory|sqlite|off), or None when off"""
+    backend = os.getenv("VAJRA_SESSIONS", "memory")
+    if backend == "off":
+        return None
+    options = dict(
+        max_turns=int(os.getenv("VAJRA_SESSION_TURNS", "3")),
+        ttl=float(os.getenv("VAJRA_SESSION_TTL", "1800")),
+        max_sessions=int(os.getenv("VAJRA_SESSION_MAX", "10000")),
+        max_bytes=int(float(os.getenv("VAJRA_SESSION_MAX_MB", "16")) * 1024 * 1024),
+    )
+    if backend == "sqlite":
+        return SqliteSessionStore(os.getenv("VAJRA_SESSION_DB", "vajra_sessions.db"), **options)
+    if backend == "memory":
+        return MemorySessionStore(**options)
+    raise ValueError(f"Unknown session store '{backend}'. Choose from: memory, sqlite, off")
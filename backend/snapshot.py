@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+VAJRA Corpus Snapshot
+Compiled, memory-mapped form of every corpus for fast cold starts.
+
+    data/snapshot/vectors.f32   all acts' vectors, one float32 row per section
+    data/snapshot/norms.f32     squared norm of every row (for L2 search)
+    data/snapshot/text.bin      UTF-8 JSON of every section, back to back
+    data/snapshot/offsets.i64   byte offset of each section in text.bin
+    data/snapshot/keywords.npz  BM25 postings of the keyword index, in flat arrays
+    data/snapshot/numbers.json  normalized section number of every row, per act
+    data/snapshot/meta.json     acts, row ranges and the source files it was built from
+
+Loading maps these files instead of parsing JSON and deserializing FAISS
+indices, so forked workers share one copy through the page cache. The keyword
+index and section lookup are compiled in too, so a section's text is only
+decoded when it is actually returned.
+
+Usage:
+    python snapshot.py      # compile from data/*.json + data/*.faiss
+"""
+
+import io
+import json
+import os
+import sys
+from collections.abc import Sequence
+
+import numpy as np
+
+from corpora import CORPORA, DATA_DIR, data_path, index_path, read_index_meta
+from keyword_index import KeywordIndex
+from section_lookup import section_numbers
+
+SNAPSHOT_VERSION = 3
+
+
+def snapshot_dir(data_dir=DATA_DIR):
+    return os.path.join(data_dir, "snapshot")
+
+
+def source_files(data_dir=DATA_DIR):
+    return [path for _, prefix in CORPORA for path in (data_path(prefix, data_dir), index_path(prefix, data_dir))]
+
+
+def source_stamp(paths):
+    """path -> [mtime_ns, size]; the snapshot is fresh while these match"""
+    stamp = {}
+    for path in paths:
+        st = os.stat(path)
+        stamp[os.path.basename(path)] = [st.st_mtime_ns, st.st_size]
+    return stamp
+
+
+class MemmapFlatIndex:
+    """Exact search over a memory-mapped matrix, with faiss' search() interface.
+
+    metric "l2" returns squared L2 distances like IndexFlatL2 (ascending),
+    "ip" inner products like IndexFlatIP (descending).
+    """
+
+    def __init__(self, vectors, norms, metric="l2"):
+        self.vectors = vectors
+        self.norms = norms
+        self.metric = metric
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, queries, k):
+        queries = np.asarray(queries, dtype="float32").reshape(-1, self.d)
+        k_found = min(k, self.ntotal)
+        if self.metric == "ip":
+            # Sort on negated similarity so both metrics share the ascending path below
+            distances = -(queries @ self.vectors.T)
+        else:
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, same squared distance as IndexFlatL2
+            distances = (
+                self.norms[None, :]
+                - 2.0 * (queries @ self.vectors.T)
+                + np.einsum("ij,ij->i", queries, queries)[:, None]
+            )
+        top = np.argpartition(distances, k_found - 1, axis=1)[:, :k_found]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        if self.metric == "ip":
+            top_distances = -top_distances
+
+        out_distances = np.full((len(queries), k), -np.inf if self.metric == "ip" else np.inf, dtype="float32")
+        out_indices = np.full((len(queries), k), -1, dtype="int64")
+        out_distances[:, :k_found] = np.take_along_axis(top_distances, order, axis=1)
+        out_indices[:, :k_found] = np.take_along_axis(top, order, axis=1)
+        return out_distances, out_indices
+
+    def reconstruct_n(self, i0, n):
+        return np.array(self.vectors[i0:i0 + n])
+
+
+class LazyEntries(Sequence):
+    """Read-only list of section dicts, decoded from the text blob on access"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("section index out of range")
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return json.loads(bytes(self.blob[start:end]).decode("utf-8"))
+
+
+def compile_snapshot(data_dir=DATA_DIR):
+    """Write the snapshot for the current JSON data and FAISS indices (flat indices only)"""
+    import faiss
+
+    metas = {prefix: read_index_meta(prefix, data_dir) for _, prefix in CORPORA}
+    metrics = {meta["metric"] for meta in metas.values()}
+    if any(not meta["index_type"].startswith("flat") for meta in metas.values()) or len(metrics) > 1:
+        print("⚠️ Snapshot skipped: it needs flat indices with one metric for every act")
+        return None
+
+    out_dir = snapshot_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    acts, vectors, blobs, offsets, loaded = [], [], [], [0], {}
+    for act, prefix in CORPORA:
+        with open(data_path(prefix, data_dir), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        index = faiss.read_index(index_path(prefix, data_dir))
+        if index.ntotal != len(entries):
+            raise ValueError(f"{act}: index has {index.ntotal} vectors for {len(entries)} sections")
+
+        acts.append({"act": act, "prefix": prefix, "start": sum(len(v) for v in vectors), "count": len(entries),
+                     "metric": metas[prefix]["metric"]})
+        vectors.append(index.reconstruct_n(0, index.ntotal))
+        loaded[act] = {"entries": entries}
+        for entry in entries:
+            blob = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            blobs.append(blob)
+            offsets.append(offsets[-1] + len(blob))
+
+    vectors = np.ascontiguousarray(np.vstack(vectors), dtype="float32")
+    terms, term_offsets, doc_ids, weights = KeywordIndex(loaded).arrays()
+    postings = io.BytesIO()
+    np.savez(postings, terms=np.array(terms), offsets=term_offsets, docs=doc_ids, weights=weights)
+    files = {
+        "vectors.f32": vectors.tobytes(),
+        "norms.f32": np.einsum("ij,ij->i", vectors, vectors).astype("float32").tobytes(),
+        "text.bin": b"".join(blobs),
+        "offsets.i64": np.array(offsets, dtype="int64").tobytes(),
+        "keywords.npz": postings.getvalue(),
+        "numbers.json": json.dumps(section_numbers(loaded)).encode("utf-8"),
+    }
+    for name, payload in files.items():
+        with open(os.path.join(out_dir, name + ".tmp"), "wb") as f:
+            f.write(payload)
+        os.replace(os.path.join(out_dir, name + ".tmp"), os.path.join(out_dir, name))
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "dimension": int(vectors.shape[1]),
+        "acts": acts,
+        "sources": source_stamp(source_files(data_dir)),
+    }
+    # meta.json goes last: a snapshot without it is never loaded
+    with open(os.path.join(out_dir, "meta.json.tmp"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(os.path.join(out_dir, "meta.json.tmp"), os.path.join(out_dir, "meta.json"))
+    print(f"✅ Snapshot: {len(vectors)} sections from {len(acts)} acts written to {out_dir}")
+    return meta
+
+
+def load_snapshot(data_dir=DATA_DIR):
+    """(corpora, unified, prebuilt) mapped from a fresh snapshot, or None to fall back to JSON.
+
+    prebuilt holds the keyword index and section numbers as CorpusVersion keyword arguments.
+    """
+    base = snapshot_dir(data_dir)
+    meta_path = os.path.join(base, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    try:
+        fresh = meta["sources"] == source_stamp(source_files(data_dir))
+    except FileNotFoundError:
+        fresh = False
+    registered = [(a["act"], a["prefix"]) for a in meta["acts"]]
+    if meta.get("version") != SNAPSHOT_VERSION or not fresh or registered != list(CORPORA):
+        print("⚠️ Corpus snapshot is stale, loading JSON data instead")
+        return None
+
+    total = sum(a["count"] for a in meta["acts"])
+    vectors = np.memmap(os.path.join(base, "vectors.f32"), dtype="float32", mode="r",
+                        shape=(total, meta["dimension"]))
+    norms = np.memmap(os.path.join(base, "norms.f32"), dtype="float32", mode="r", shape=(total,))
+    offsets = np.memmap(os.path.join(base, "offsets.i64"), dtype="int64", mode="r", shape=(total + 1,))
+    blob = np.memmap(os.path.join(base, "text.bin"), dtype="uint8", mode="r")
+
+    corpora, ids, act_ranges = {}, [], {}
+    for a in meta["acts"]:
+        start, end = a["start"], a["start"] + a["count"]
+        corpora[a["act"]] = {
+            "entries": LazyEntries(blob, offsets[start:end + 1]),
+            "index": MemmapFlatIndex(vectors[start:end], norms[start:end], a["metric"]),
+            "metric": a["metric"],
+        }
+        ids.extend((a["act"], row) for row in range(a["count"]))
+        act_ranges[a["act"]] = (start, end)
+    metric = meta["acts"][0]["metric"]
+    unified = {"index": MemmapFlatIndex(vectors, norms, metric), "ids": ids, "metric": metric}
+
+    # Keyword postings share the snapshot's row numbering: doc id = row across all acts
+    with np.load(os.path.join(base, "keywords.npz")) as postings:
+        keyword_index = KeywordIndex.from_postings(
+            ids, act_ranges, postings["terms"].tolist(), postings["offsets"], postings["docs"], postings["weights"]
+        )
+    with open(os.path.join(base, "numbers.json"), "r", encoding="utf-8") as f:
+        numbers = json.load(f)
+    return corpora, unified, {"keyword_index": keyword_index, "section_numbers": numbers}
+
+
+if __name__ == "__main__":
+    compile_snapshot()
+    sys.exit(0)
@@ -0,0 +1,20 @@
+"""
+VAJRA WhatsApp helpers
+Reply logic shared by the Flask (app.py) and ASGI (asgi.py) webhooks
+"""
+
+GREETINGS = ['hi', 'hello', 'start']
+
+WELCOME_TEXT = (
+    "Welcome to VAJRA, your AI legal assistant for BNS, BSA, and BNSS.\n\n"
+    "Ask me a question like:\n"
+    "-> What is the punishment for theft?\n"
+    "-> What are the rights during an arrest?"
+)
+
+
+def welcome_reply(incoming_msg):
+    """Welcome text for empty messages and greetings, None for real questions"""
+    if not incoming_msg or incoming_msg.lower() in GREETINGS:
+        return WELCOME_TEXT
+    return None
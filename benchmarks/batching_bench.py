@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+VAJRA batching benchmark - retrieval throughput with and without micro-batching.
+
+N client threads each retrieve distinct questions back to back (embedding
+cache defeated) for a fixed duration. The embedding API is replaced by the
+offline fake embedder behind a simulated round-trip: a fixed latency per
+call plus a small cost per text, with at most --api-concurrency calls in
+flight (the API quota). Batching amortizes the per-call cost and the quota.
+Each concurrency level runs once unbatched and once per batching window.
+
+Usage:
+    python benchmarks/batching_bench.py --concurrency 1 4 16 64 --windows 2 5 --json batching.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "backend"))
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-offline")
+os.environ["VAJRA_EMBED_CACHE_DIR"] = ""
+os.environ["VAJRA_BATCH_WINDOW_MS"] = "0"
+
+import google.generativeai as genai  # noqa: E402
+
+from batcher import RetrievalBatcher  # noqa: E402
+from embedders import FakeEmbedder  # noqa: E402
+
+TOPICS = ["theft", "murder", "bail", "evidence", "arrest", "cheating", "dowry", "defamation",
+          "kidnapping", "confession", "warrant", "trespass", "forgery", "assault", "summons"]
+
+
+def fake_embed_api(call_ms, per_text_ms, max_in_flight):
+    """Stand-in for genai.embed_content with a simulated, quota-limited network round-trip"""
+    embedder = FakeEmbedder()
+    calls = itertools.count(1)
+    quota = threading.BoundedSemaphore(max_in_flight)
+
+    def embed_content(model, content, **kwargs):
+        texts = content if isinstance(content, list) else [content]
+        next(calls)
+        with quota:
+            time.sleep((call_ms + per_text_ms * len(texts)) / 1000.0)
+        vectors = embedder.embed(texts)
+        return {"embedding": vectors.tolist() if isinstance(content, list) else vectors[0].tolist()}
+
+    return embed_content, calls
+
+
+def run(agent, concurrency, duration, retrieve):
+    latencies, lock = [], threading.Lock()
+    stop_at = time.monotonic() + duration
+    counter = itertools.count()
+
+    def client(n):
+        local = []
+        while time.monotonic() < stop_at:
+            i = next(counter)
+            query = f"{TOPICS[i % len(TOPICS)]} case {i} from client {n}"
+            t0 = time.perf_counter()
+            retrieve(query)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    return {
+        "requests": len(latencies),
+        "qps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrieval throughput with and without micro-batching")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--windows", type=float, nargs="+", default=[2.0, 5.0], help="batch windows (ms)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per run")
+    parser.add_argument("--call-ms", type=float, default=40.0, help="simulated latency per embed call")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="simulated latency per embedded text")
+    parser.add_argument("--api-concurrency", type=int, default=8, help="embed calls allowed in flight")
+    parser.add_argument("--workers", type=int, default=4, help="batches in flight")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    genai.embed_content, calls = fake_embed_api(args.call_ms, args.per_text_ms, args.api_concurrency)
+    from cli_agent import VajraCLI
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = VajraCLI()
+    agent.embedding_cache.max_size = 0
+
+    rows = []
+    for concurrency in args.concurrency:
+        modes = [("unbatched", None)] + [(f"{w:g}ms", w) for w in args.windows]
+        for label, window in modes:
+            batcher = None
+            if window is None:
+                retrieve = agent.retrieve
+            else:
+                batcher = RetrievalBatcher(
+                    agent.embed_batch, lambda q, k: agent.search_embeddings(q, k=k),
+                    max_batch=args.max_batch, window_ms=window, workers=args.workers
+                )
+                retrieve = lambda query: batcher.retrieve(query, agent.retrieval_k())  # noqa: E731
+            first_call = next(calls)
+            with contextlib.redirect_stdout(io.StringIO()):
+                row = run(agent, concurrency, args.duration, retrieve)
+            row.update(concurrency=concurrency, mode=label, embed_calls=next(calls) - first_call - 1)
+            if batcher is not None:
+                row["mean_batch"] = batcher.stats()["mean_batch"]
+                batcher.shutdown()
+            rows.append(row)
+
+    print(f"embed call {args.call_ms:g}ms + {args.per_text_ms:g}ms/text, max batch {args.max_batch}, "
+          f"{args.api_concurrency} calls in flight, {args.duration:g}s per run")
+    print(f"{'clients':>7} {'mode':<10} {'qps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'calls':>7} {'batch':>6}")
+    for r in rows:
+        print(f"{r['concurrency']:>7} {r['mode']:<10} {r['qps']:>8.1f} {r['p50_ms']:>7.1f}ms "
+              f"{r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['embed_calls']:>7} {r.get('mean_batch', 1.0):>6.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"call_ms": args.call_ms, "per_text_ms": args.per_text_ms, "max_batch": args.max_batch,
+                       "api_concurrency": args.api_concurrency, "workers": args.workers,
+                       "duration": args.duration, "results": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+VAJRA index benchmark - recall vs speed vs memory for every index type.
+
+Uses the vectors of the shipped indices (all acts, as one unified index).
+Queries are section vectors with Gaussian noise added, standing in for
+paraphrased questions. Ground truth is exact cosine top-k (flat-ip); each
+index type is scored on recall@k against it, single-query latency
+percentiles, build time and serialized size.
+
+Usage:
+    python benchmarks/index_bench.py --queries 500 --k 5 --json index_bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "backend"))
+
+from corpora import CORPORA, index_path  # noqa: E402
+from index_factory import INDEX_TYPES, make_index, prepare_query, index_metric  # noqa: E402
+
+
+def load_vectors():
+    vectors = []
+    for _, prefix in CORPORA:
+        index = faiss.read_index(index_path(prefix))
+        vectors.append(index.reconstruct_n(0, index.ntotal))
+    return np.vstack(vectors).astype("float32")
+
+
+def make_queries(vectors, n, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), n)]
+    scale = noise * np.linalg.norm(picks, axis=1, keepdims=True) / np.sqrt(vectors.shape[1])
+    return (picks + rng.standard_normal(picks.shape).astype("float32") * scale).astype("float32")
+
+
+def percentile_us(samples, pct):
+    return float(np.percentile(samples, pct) * 1e6)
+
+
+def bench(index_type, vectors, queries, truth, k):
+    started = time.perf_counter()
+    index = make_index(index_type, vectors)
+    build_s = time.perf_counter() - started
+
+    metric = index_metric(index_type)
+    latencies, found = [], []
+    for q in queries:
+        q = prepare_query(metric, q)
+        t0 = time.perf_counter()
+        _, ids = index.search(q, k)
+        latencies.append(time.perf_counter() - t0)
+        found.append(ids[0])
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "index_type": index_type,
+        "recall_at_k": float(recall),
+        "p50_us": percentile_us(latencies, 50),
+        "p95_us": percentile_us(latencies, 95),
+        "p99_us": percentile_us(latencies, 99),
+        "build_s": build_s,
+        "bytes": int(faiss.serialize_index(index).size),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall/latency/memory of VAJRA's index types")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.5, help="query noise relative to vector norm")
+    parser.add_argument("--types", nargs="+", choices=list(INDEX_TYPES), default=list(INDEX_TYPES))
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    vectors = load_vectors()
+    queries = make_queries(vectors, args.queries, args.noise)
+    baseline = make_index("flat-ip", vectors)
+    _, truth = baseline.search(prepare_query("ip", queries), args.k)
+
+    rows = [bench(index_type, vectors, queries, truth, args.k) for index_type in args.types]
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]}d, {args.queries} queries, recall@{args.k} vs exact cosine")
+    print(f"{'index':<9} {'recall':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'build':>8} {'size':>10}")
+    for r in rows:
+        print(f"{r['index_type']:<9} {r['recall_at_k']:>7.3f} {r['p50_us']:>7.1f}us {r['p95_us']:>7.1f}us "
+              f"{r['p99_us']:>7.1f}us {r['build_s'] * 1000:>6.0f}ms {r['bytes'] / 1024:>7.0f}KiB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(vectors), "dimension": int(vectors.shape[1]), "k": args.k,
+                       "queries": args.queries, "noise": args.noise, "results": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+VAJRA load benchmark - the full RAG pipeline under concurrent load, offline.
+
+Drives VajraCLI.generate_response and/or the Flask /whatsapp webhook from N
+client threads with a replayable question set. Embedding and generation use
+the fake backends (VAJRA_LLM_BACKEND=fake) with injected latency, so runs
+need no API key and are repeatable. Reports startup time, memory of the
+worker process, throughput, end-to-end latency percentiles and p50/p95/p99
+for every pipeline stage, as a table and as JSON for before/after diffs.
+
+Questions come from --queries (a text file with one question per line, or
+JSONL with a "query", "question", "body" or "title" field) or are generated
+over all three acts: topic questions from section titles, cited-section
+questions ("BNS 303") and scenario questions from section examples.
+
+Usage:
+    python benchmarks/load_bench.py --concurrency 1 8 32 --requests 300 --json load.json
+    python benchmarks/load_bench.py --target whatsapp --embed-latency-ms 80 --llm-latency-ms 900
+    python benchmarks/load_bench.py --write-queries questions.txt     # save the generated set
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "backend"))
+
+TEMPLATES = [
+    "What is the punishment for {title}?",
+    "Explain the law on {title}",
+    "what does the law say about {title} in India",
+]
+
+
+def generate_queries(n, seed=0):
+    """Deterministic mix of topic, cited-section and scenario questions over every act"""
+    from corpora import CORPORA, data_path
+    from section_lookup import normalize_number
+
+    rng = random.Random(seed)
+    sections = []
+    for act, prefix in CORPORA:
+        with open(data_path(prefix), "r", encoding="utf-8") as f:
+            sections.extend((act, entry) for entry in json.load(f))
+
+    queries = []
+    for _ in range(n):
+        act, entry = rng.choice(sections)
+        kind = rng.random()
+        title = entry["section_title"].split(":")[0].lower()
+        if kind < 0.6:
+            queries.append(rng.choice(TEMPLATES).format(title=title))
+        elif kind < 0.8:
+            queries.append(f"What does {act} section {normalize_number(entry['section_number'])} say?")
+        else:
+            example = rng.choice(entry.get("examples") or [entry["description"]])
+            queries.append(f"{example} What are my options?")
+    return queries
+
+
+def load_queries(path):
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                line = next((record[k] for k in ("query", "question", "body", "Body", "title") if record.get(k)), "")
+            if line:
+                queries.append(line)
+    return queries
+
+
+def memory_kb():
+    """(rss, pss, peak rss) of this process in KiB; pss is 0 where /proc is unavailable"""
+    rss = pss = 0
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return rss or peak, pss, peak
+
+
+def percentiles_ms(samples):
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+def run_level(send, queries, concurrency, n_requests):
+    """n_requests questions from concurrency client threads -> throughput and latency"""
+    from metrics import METRICS
+
+    METRICS.reset()
+    counter = itertools.count()
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def client():
+        local, failed = [], 0
+        while True:
+            i = next(counter)
+            if i >= n_requests:
+                break
+            t0 = time.perf_counter()
+            try:
+                send(queries[i % len(queries)])
+            except Exception:
+                failed += 1
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - started
+
+    stages = {}
+    with METRICS._lock:
+        samples = {key: list(values) for key, values in METRICS.samples.items()}
+        counters = dict(METRICS.counters)
+    for (name, labels), values in sorted(samples.items()):
+        if name == "vajra_stage_seconds":
+            stages[" ".join(str(v) for _, v in sorted(labels, key=lambda kv: kv[0] != "stage"))] = percentiles_ms(values)
+    answers = {dict(labels)["source"]: value for (name, labels), value in counters.items()
+               if name == "vajra_answers_total"}
+
+    return dict(
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors[0],
+        seconds=elapsed,
+        qps=len(latencies) / elapsed,
+        latency=percentiles_ms(latencies),
+        stages=stages,
+        answers=answers,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test of VAJRA's RAG pipeline")
+    parser.add_argument("--target", choices=["agent", "whatsapp", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--queries", help="replay questions from this file instead of generating them")
+    parser.add_argument("--n-queries", type=int, default=500, help="size of the generated question set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-queries", help="write the question set to this file and exit")
+    parser.add_argument("--embed-latency-ms", type=float, default=50.0, help="injected latency per embedding call")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0, help="injected latency per generation call")
+    parser.add_argument("--caches", action="store_true", help="keep the embedding and response caches on")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.queries) if args.queries else generate_queries(args.n_queries, args.seed)
+    if args.write_queries:
+        with open(args.write_queries, "w", encoding="utf-8") as f:
+            f.write("\n".join(queries) + "\n")
+        print(f"Wrote {len(queries)} questions to {args.write_queries}")
+        return 0
+
+    os.environ["VAJRA_LLM_BACKEND"] = "fake"
+    os.environ["VAJRA_DEFERRED_REPLIES"] = "0"
+    if not args.caches:
+        os.environ["VAJRA_EMBED_CACHE_SIZE"] = "0"
+        os.environ["VAJRA_EMBED_CACHE_DIR"] = ""
+        os.environ["VAJRA_RESPONSE_CACHE_SIZE"] = "0"
+
+    from metrics import METRICS
+
+    METRICS.enabled = True
+    METRICS.keep_samples = 100000
+    rss_before, _, _ = memory_kb()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.target == "agent":
+            from cli_agent import VajraCLI
+            agent, flask_app = VajraCLI(), None
+        else:
+            import app as webhook
+            agent, flask_app = webhook.vajra_agent, webhook.app
+    startup = {
+        "startup_s": time.perf_counter() - t0,
+        "corpus_load_s": METRICS.gauges.get(("vajra_corpus_load_seconds", ()), 0.0),
+        "rss_after_startup_kb": memory_kb()[0],
+        "rss_before_startup_kb": rss_before,
+    }
+    agent.llm.embedder.latency = args.embed_latency_ms / 1000.0
+    agent.llm.generator.latency = args.llm_latency_ms / 1000.0
+
+    targets = ["agent", "whatsapp"] if args.target == "both" else [args.target]
+    local = threading.local()
+    senders = itertools.count()
+
+    def send_whatsapp(question):
+        if not hasattr(local, "client"):
+            local.client = flask_app.test_client()
+        # A sender per request - the questions are unrelated, not one conversation's follow-ups
+        sender = f"whatsapp:+91{next(senders):010d}"
+        response = local.client.post("/whatsapp", data={"Body": question, "From": sender})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    runs = []
+    for target in targets:
+        send = agent.generate_response if target == "agent" else send_whatsapp
+        for concurrency in args.concurrency:
+            row = run_level(send, queries, concurrency, args.requests)
+            row["target"] = target
+            runs.append(row)
+
+    rss, pss, peak = memory_kb()
+    memory = {"rss_kb": rss, "pss_kb": pss, "peak_rss_kb": peak}
+
+    print(f"{len(queries)} questions, embed {args.embed_latency_ms:g}ms, generate {args.llm_latency_ms:g}ms, "
+          f"caches {'on' if args.caches else 'off'}")
+    print(f"startup {startup['startup_s'] * 1000:.0f}ms (corpus {startup['corpus_load_s'] * 1000:.0f}ms), "
+          f"RSS {rss / 1024:.1f}MiB, PSS {pss / 1024:.1f}MiB, peak {peak / 1024:.1f}MiB")
+    for r in runs:
+        lat = r["latency"]
+        print(f"\n{r['target']} x{r['concurrency']}: {r['qps']:.1f} req/s, {r['requests']} requests, "
+              f"{r['errors']} errors, p50 {lat['p50_ms']:.1f}ms p95 {lat['p95_ms']:.1f}ms p99 {lat['p99_ms']:.1f}ms")
+        print(f"   {'stage':<18} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for stage, s in r["stages"].items():
+            print(f"   {stage:<18} {s['count']:>6} {s['p50_ms']:>7.2f}ms {s['p95_ms']:>7.2f}ms {s['p99_ms']:>7.2f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {k: v for k, v in vars(args).items() if k not in ("json", "write_queries")},
+                "queries": len(queries),
+                "startup": startup,
+                "memory": memory,
+                "runs": runs,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+VAJRA startup benchmark - worker startup time and memory per serving mode.
+
+Modes:
+    per-worker   every worker imports and loads the agent itself (plain `gunicorn app:app`)
+    preload      the parent loads once, workers are forked from it (`gunicorn -c gunicorn.conf.py`)
+
+Each mode runs with the corpus loaded from JSON and from the memory-mapped
+snapshot. Workers stay alive together so PSS (proportional set size, shared
+pages split between the processes mapping them) shows what N workers cost.
+
+Usage (Linux only - uses fork and /proc):
+    python benchmarks/startup_bench.py --workers 4 --json startup.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "backend"))
+
+
+def memory_kb():
+    """(rss, pss) of this process in KiB"""
+    rss = pss = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def load_agent():
+    import contextlib
+    import io
+
+    from cli_agent import VajraCLI
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return VajraCLI()
+
+
+def touch(agent):
+    """Serve a few searches so the worker maps the pages a real request would"""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    dim = next(iter(agent.corpora.values()))["index"].d
+    for _ in range(20):
+        for hit in agent.search_embedding(rng.standard_normal(dim).astype("float32"), k=3):
+            hit["section_title"]
+
+
+def worker(started, results, release, preloaded):
+    t0 = time.perf_counter()
+    agent = preloaded or load_agent()
+    ready = time.perf_counter() - t0
+    touch(agent)
+    rss, pss = memory_kb()
+    results.put({"pid": os.getpid(), "startup_s": ready, "since_fork_s": time.perf_counter() - started,
+                 "rss_kb": rss, "pss_kb": pss})
+    release.wait()
+
+
+def run_mode(mode, snapshot, n_workers):
+    os.environ["VAJRA_SNAPSHOT"] = "1" if snapshot else "0"
+    ctx = multiprocessing.get_context("fork")
+    results, release = ctx.Queue(), ctx.Event()
+
+    preloaded, preload_s = None, 0.0
+    if mode == "preload":
+        t0 = time.perf_counter()
+        preloaded = load_agent()
+        preload_s = time.perf_counter() - t0
+
+    procs = [ctx.Process(target=worker, args=(time.perf_counter(), results, release, preloaded))
+             for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    workers = [results.get() for _ in procs]
+    release.set()
+    for proc in procs:
+        proc.join()
+
+    return {
+        "mode": mode,
+        "corpus": "snapshot" if snapshot else "json",
+        "workers": n_workers,
+        "master_load_s": preload_s,
+        "worker_startup_s_max": max(w["startup_s"] for w in workers),
+        "worker_startup_s_mean": sum(w["startup_s"] for w in workers) / n_workers,
+        "worker_rss_kb_mean": sum(w["rss_kb"] for w in workers) // n_workers,
+        "worker_pss_kb_mean": sum(w["pss_kb"] for w in workers) // n_workers,
+        "total_pss_kb": sum(w["pss_kb"] for w in workers),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare VAJRA worker startup time and memory per serving mode")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")  # configure() only, no API calls are made
+    from snapshot import compile_snapshot, load_snapshot
+
+    if load_snapshot() is None:
+        compile_snapshot()
+
+    rows = []
+    for snapshot in (False, True):
+        for mode in ("per-worker", "preload"):
+            # Run each mode from a clean parent so earlier loads don't leak into it
+            ctx = multiprocessing.get_context("fork")
+            out = ctx.Queue()
+            proc = ctx.Process(target=lambda: out.put(run_mode(mode, snapshot, args.workers)))
+            proc.start()
+            rows.append(out.get())
+            proc.join()
+
+    print(f"{'mode':<11} {'corpus':<9} {'master load':>11} {'worker start':>12} {'RSS/worker':>11} {'PSS/worker':>11} {'total PSS':>10}")
+    for r in rows:
+        print(f"{r['mode']:<11} {r['corpus']:<9} {r['master_load_s'] * 1000:>9.1f}ms "
+              f"{r['worker_startup_s_max'] * 1000:>10.1f}ms {r['worker_rss_kb_mean'] / 1024:>8.1f}MiB "
+              f"{r['worker_pss_kb_mean'] / 1024:>8.1f}MiB {r['total_pss_kb'] / 1024:>7.1f}MiB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# gunicorn.conf.py
+#
+# Preloaded serving: the VAJRA agent and corpus are loaded once in the master,
+# then workers are forked and share them copy-on-write (the memory-mapped
+# corpus snapshot is shared through the page cache). API clients, thread pools
+# and the deferred reply queue are re-created in each worker after the fork.
+#
+#   gunicorn -c gunicorn.conf.py app:app
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("VAJRA_WORKER_THREADS", "4"))
+timeout = 60
+preload_app = True
+
+
+def ensure_snapshot():
+    """Compile the corpus snapshot if it is missing or stale.
+
+    Runs when gunicorn reads this file - before the preloaded app is imported.
+    """
+    from snapshot import compile_snapshot, load_snapshot
+
+    if os.getenv("VAJRA_SNAPSHOT", "1") != "0" and load_snapshot() is None:
+        try:
+            compile_snapshot()
+        except Exception as e:
+            print(f"⚠️ Could not compile corpus snapshot, loading JSON instead: {e}")
+
+
+ensure_snapshot()
+
+
+def preloaded_app():
+    """The preloaded app module (app.py or asgi.py), or None when nothing is preloaded yet"""
+    for name in ("app", "asgi"):
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, "vajra_agent"):
+            return module
+    return None
+
+
+def when_ready(server):
+    # The master only forks workers: stop the threads the preloaded agent and
+    # reply queue started, each worker starts its own in post_fork
+    module = preloaded_app()
+    if module is None:
+        return
+    module.vajra_agent.stop_executors()
+    if getattr(module, "reply_queue", None) is not None:
+        module.reply_queue.shutdown()
+
+
+def post_fork(server, worker):
+    module = preloaded_app()
+    if module is None:
+        return
+    module.vajra_agent.reinit_after_fork()
+    if hasattr(module, "restart_reply_queue"):
+        module.restart_reply_queue()
+    server.log.info(f"VAJRA worker {worker.pid} forked from the preloaded agent")
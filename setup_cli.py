@@ -41,32 +41,36 @@ def check_requirements():
 
 def check_data_files():
     """Check if data files exist"""
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+    from corpora import CORPORA, data_path, index_path
     
-    # Check BNS data
-    bns_data_path = os.path.join(data_dir, 'bns_data.json')
-    if not os.path.exists(bns_data_path):
-        print("❌ BNS data file not found")
-        return False
+    missing_index = False
+    for act, prefix in CORPORA:
+        # Check section data
+        if not os.path.exists(data_path(prefix)):
+            print(f"❌ {act} data file not found")
+            return False
+        
+        # Check FAISS index
+        if not os.path.exists(index_path(prefix)):
+            print(f"⚠️ {act} FAISS index not found.")
+            missing_index = True
     
-    # Check FAISS index
-    faiss_index_path = os.path.join(data_dir, 'bns_index.faiss')
-    if not os.path.exists(faiss_index_path):
-        print("⚠️ FAISS index not found. Creating embeddings...")
+    if missing_index:
+        print("⚠️ Creating embeddings...")
         return create_embeddings()
     
     print("✅ Data files found")
     return True
 
 def create_embeddings():
-    """Create FAISS embeddings if they don't exist"""
+    """Create FAISS embeddings if they don't exist (only missing sections are embedded)"""
     try:
         backend_dir = os.path.join(os.path.dirname(__file__), 'backend')
-        embed_script = os.path.join(backend_dir, 'embed.py')
+        build_script = os.path.join(backend_dir, 'build_index.py')
         
-        if os.path.exists(embed_script):
-            os.chdir(backend_dir)
-            subprocess.check_call([sys.executable, 'embed.py'])
+        if os.path.exists(build_script):
+            subprocess.check_call([sys.executable, build_script])
             print("✅ Embeddings created successfully")
             return True
         else:
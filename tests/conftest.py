@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend modules import each other by bare name, as in app.py and run_cli.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from build_index import build_corpus, checkpoint_path, load_checkpoint, parse_args
+from embedders import FakeEmbedder
+
+
+class FailingOnce(FakeEmbedder):
+    """Fake embedder whose first call fails with a non-transient error"""
+
+    def __init__(self):
+        super().__init__(latency=0.01)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts, timeout=None):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            raise ValueError("rejected batch")
+        return super().embed(texts, timeout)
+
+
+def test_failed_batch_stops_the_build_and_keeps_finished_batches(tmp_path):
+    args = parse_args(["--embedder", "fake", "--out-dir", str(tmp_path), "--batch-size", "20",
+                       "--workers", "2", "--rate-limit", "0"])
+    embedder = FailingOnce()
+    with pytest.raises(ValueError):
+        build_corpus("BNS", "bns", embedder, args)
+
+    # Queued batches are cancelled instead of spending quota, finished ones are checkpointed
+    checkpointed = load_checkpoint(checkpoint_path("bns", str(tmp_path)))
+    assert embedder.calls <= 1 + 2 * args.workers
+    assert len(checkpointed) == 20 * (embedder.calls - 1)
+
+    # A rerun embeds only what is missing
+    resumed = FakeEmbedder()
+    vectors = build_corpus("BNS", "bns", resumed, args)
+    assert len(load_checkpoint(checkpoint_path("bns", str(tmp_path)))) == len(vectors)
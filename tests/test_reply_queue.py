@@ -0,0 +1,45 @@
+import time
+
+from reply_queue import DeferredReplyQueue, RecordingTwilioClient, split_message
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_replies_for_one_sender_go_out_in_order():
+    client = RecordingTwilioClient()
+    replies = DeferredReplyQueue(lambda body, sender: f"re: {body}", client, workers=3)
+    for i in range(5):
+        assert replies.submit("whatsapp:+1", "whatsapp:+2", f"q{i}")
+    assert wait_for(lambda: replies.stats()["completed"] == 5)
+    assert [m["body"] for m in client.sent] == [f"re: q{i}" for i in range(5)]
+    replies.shutdown()
+
+
+def test_a_sender_of_none_does_not_stop_a_worker():
+    replies = DeferredReplyQueue(lambda body, sender: "ok", RecordingTwilioClient(), workers=1)
+    replies.submit(None, "whatsapp:+2", "q")
+    replies.submit("whatsapp:+1", "whatsapp:+2", "q")
+    assert wait_for(lambda: replies.stats()["completed"] == 2)
+    assert replies.stats()["depth"] == 0
+    assert replies.workers[0].is_alive()
+    replies.shutdown()
+
+
+def test_full_queue_pushes_back():
+    replies = DeferredReplyQueue(lambda body, sender: time.sleep(0.2) or "ok", RecordingTwilioClient(),
+                                 max_depth=1, workers=1)
+    assert replies.submit("a", "b", "q")
+    assert not replies.submit("c", "b", "q")
+    assert replies.stats()["rejected"] == 1
+    replies.shutdown()
+
+
+def test_long_replies_are_split_under_the_twilio_limit():
+    chunks = split_message("line\n" * 1000, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).count("line") == 1000
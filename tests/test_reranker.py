@@ -0,0 +1,40 @@
+from reranker import FakeCrossEncoder, Reranker
+
+
+def section(number, title, description, similarity):
+    return {"act": "BNS", "section_number": number, "section_title": title,
+            "description": description, "similarity": similarity}
+
+
+RESULTS = [
+    section("Section 1", "Short title", "Title, extent and commencement of the Sanhita", 0.9),
+    section("Section 303", "Theft", "Whoever dishonestly takes movable property commits theft", 0.5),
+    section("Section 318", "Cheating", "Whoever deceives any person commits cheating", 0.4),
+]
+
+
+def numbers(results):
+    return [c["section_number"] for c in results]
+
+
+def test_rerank_keeps_the_best_scored_sections():
+    ranked = Reranker(FakeCrossEncoder(), top_n=2).rerank("punishment for theft of movable property", RESULTS)
+    assert numbers(ranked)[0] == "Section 303"
+    assert len(ranked) == 2
+    assert ranked[0]["rerank_score"] > ranked[1]["rerank_score"]
+
+
+def test_pair_scores_are_cached_per_corpus_version():
+    reranker = Reranker(FakeCrossEncoder())
+    reranker.rerank("what is cheating", RESULTS, version=1)
+    reranker.rerank("What is  cheating", RESULTS, version=1)
+    assert reranker.stats()["hits"] == len(RESULTS)
+    reranker.rerank("what is cheating", RESULTS, version=2)
+    assert reranker.stats()["hits"] == len(RESULTS)
+
+
+def test_over_budget_keeps_vector_order():
+    reranker = Reranker(FakeCrossEncoder(latency=0.01), top_n=2, budget_ms=1, batch_size=1)
+    ranked = reranker.rerank("punishment for theft of movable property", RESULTS)
+    assert numbers(ranked) == ["Section 1", "Section 303"]
+    assert reranker.stats()["fallbacks"] == 1
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_client import is_transient
+from resilience import CallPolicy, CircuitBreaker, CircuitOpenError, ahedged_call, hedged_call
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns "ok" """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, timeout):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def policy(**options):
+    options.setdefault("base_delay", 0.0)
+    return CallPolicy(retry_if=is_transient, **options)
+
+
+def test_transient_errors_are_retried():
+    fn = Flaky(ConnectionError("reset"), TimeoutError("slow"))
+    assert policy(attempts=3).call(fn) == "ok"
+    assert fn.calls == 3
+
+
+def test_non_transient_errors_are_raised_at_once():
+    fn = Flaky(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        policy(attempts=3).call(fn)
+    assert fn.calls == 1
+
+
+def test_breaker_opens_after_repeated_failures_and_recovers_through_a_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    calls = policy(attempts=1, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            calls.call(Flaky(ConnectionError("down")))
+    assert breaker.state == "open"
+
+    fn = Flaky()
+    with pytest.raises(CircuitOpenError):
+        calls.call(fn)
+    assert fn.calls == 0
+
+    time.sleep(0.06)
+    assert calls.call(fn) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_non_transient_errors_do_not_open_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=2)
+    calls = policy(attempts=1, breaker=breaker)
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            calls.call(Flaky(ValueError("blocked")))
+    assert breaker.state == "closed"
+
+
+def test_cancelled_trial_call_does_not_wedge_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    calls = policy(attempts=1, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        calls.call(Flaky(ConnectionError("down")))
+
+    async def cancelled(timeout):
+        raise asyncio.CancelledError()
+
+    async def ok(timeout):
+        return "ok"
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(calls.acall(cancelled))
+    assert asyncio.run(calls.acall(ok)) == "ok"
+
+
+def slow_then_fast():
+    delays = iter([0.5, 0.0])
+    return lambda: next(delays)
+
+
+def test_hedged_call_returns_the_faster_copy():
+    delays = slow_then_fast()
+
+    def fn():
+        delay = delays()
+        time.sleep(delay)
+        return delay
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        started = time.monotonic()
+        assert hedged_call(fn, 0.05, pool) == 0.0
+        assert time.monotonic() - started < 0.4
+
+
+def test_async_hedged_call_returns_the_faster_copy():
+    delays = slow_then_fast()
+
+    async def fn():
+        delay = delays()
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(ahedged_call(fn, 0.05)) == 0.0
+
+
+def test_fast_call_is_not_hedged():
+    fn = Flaky()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert hedged_call(lambda: fn(None), 1.0, pool) == "ok"
+    assert fn.calls == 1
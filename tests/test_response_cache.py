@@ -0,0 +1,27 @@
+import numpy as np
+
+from response_cache import ResponseCache
+
+SECTIONS = [("BNS", "303"), ("BNS", "304")]
+
+
+def test_near_duplicate_question_over_the_same_sections_hits():
+    cache = ResponseCache(max_distance=0.05, version=1)
+    cache.store(np.array([1.0, 0.0]), SECTIONS, "answer", version=1)
+    assert cache.lookup(np.array([1.0, 0.01]), list(reversed(SECTIONS)), version=1) == "answer"
+    assert cache.lookup(np.array([0.0, 1.0]), SECTIONS, version=1) is None
+    assert cache.lookup(np.array([1.0, 0.0]), SECTIONS[:1], version=1) is None
+
+
+def test_answers_from_a_replaced_corpus_version_are_ignored():
+    cache = ResponseCache(version=1)
+    cache.store(np.array([1.0, 0.0]), SECTIONS, "old", version=1)
+    cache.clear(version=2)
+
+    # A request still pinned to version 1 finishes after the reload
+    cache.store(np.array([1.0, 0.0]), SECTIONS, "stale", version=1)
+    assert cache.lookup(np.array([1.0, 0.0]), SECTIONS, version=2) is None
+    assert cache.lookup(np.array([1.0, 0.0]), SECTIONS, version=1) is None
+
+    cache.store(np.array([1.0, 0.0]), SECTIONS, "new", version=2)
+    assert cache.lookup(np.array([1.0, 0.0]), SECTIONS, version=2) == "new"
@@ -0,0 +1,42 @@
+import pytest
+
+from section_lookup import SectionLookup, parse_section_refs
+
+
+@pytest.mark.parametrize("question, refs", [
+    ("what is BNS section 318", [("BNS", "318")]),
+    ("BNSS 35", [("BNSS", "35")]),
+    ("u/s 63 of BSA", [("BSA", "63")]),
+    ("section 318 of the BNS", [("BNS", "318")]),
+    ("BNS s. 115(2) and 116", [("BNS", "115"), ("BNS", "116")]),
+    ("what is 498a ipc", [("IPC", "498A")]),
+    ("35 bnss?", [("BNSS", "35")]),
+    ("35 and 36 bnss", [("BNSS", "35"), ("BNSS", "36")]),
+    ("In BNS, section 4 and BSA section 5", [("BNS", "4"), ("BSA", "5")]),
+    ("section 4 of BNS and section 5", [("BNS", "4"), ("BNS", "5")]),
+    ("what does section 303 say under BNS", [("BNS", "303")]),
+])
+def test_citations_are_parsed_in_order(question, refs):
+    assert parse_section_refs(question) == refs
+
+
+@pytest.mark.parametrize("question", [
+    # Counts before an act name are not citations
+    "list 5 BNS offences for women",
+    "top 10 bns sections on theft",
+    "what are the 3 bnss provisions on bail",
+    "can 2 bns offences be tried together",
+    # No act to resolve a bare section number against
+    "what does section 303 say",
+    "is section 5 the same in BNS and BSA",
+    "what changed in 2023 bns",
+])
+def test_non_citations_are_not_parsed(question):
+    assert parse_section_refs(question) == []
+
+
+def test_lookup_reports_citations_that_do_not_resolve():
+    corpora = {"BNS": {"entries": [{"section_number": "Section 303"}, {"section_number": "Section 318"}]}}
+    lookup = SectionLookup(corpora, correspondence_file=None)
+    assert lookup.resolve("BNS 318 and IPC 420") == ([("BNS", 1)], [("IPC", "420")])
+    assert lookup.row("BNS", "303") == 0
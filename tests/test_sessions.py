@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from sessions import MemorySessionStore, SqliteSessionStore, is_follow_up
+
+
+@pytest.mark.parametrize("question", [
+    "and what about bail for that?",
+    "What about anticipatory bail?",
+    "also is it bailable",
+    "and for a minor?",
+])
+def test_short_questions_opening_on_the_last_answer_are_follow_ups(question):
+    assert is_follow_up(question)
+
+
+@pytest.mark.parametrize("question", [
+    # Pronouns and filler openers say nothing about the previous answer
+    "Is it legal to record a phone call?",
+    "What does it mean to abscond?",
+    "so what is the punishment for murder?",
+    "Is this offence bailable under BNS?",
+    "then what is theft",
+    # Openers that start new questions as often as follow-ups
+    "What if someone hacks my bank account?",
+    "what if the accused is a woman?",
+    "how about for a minor?",
+    # Too long to lean on the previous answer alone
+    "and what is the procedure for filing an FIR against a police officer?",
+])
+def test_new_questions_are_not_follow_ups(question):
+    assert not is_follow_up(question)
+
+
+def test_record_keeps_the_last_turns_and_sections():
+    store = MemorySessionStore(max_turns=2)
+    store.record("s", "q1", "a1", [("BNS", "303")])
+    store.record("s", "q2", "a2")
+    store.record("s", "q3", "a3")
+    session = store.get("s")
+    assert session["turns"] == [["q2", "a2"], ["q3", "a3"]]
+    assert session["sections"] == [["BNS", "303"]]
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2)
+    store.record("a", "q", "a")
+    store.record("b", "q", "a")
+    store.get("a")
+    store.record("c", "q", "a")
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SqliteSessionStore(path).record("s", "q", "a", [("BNSS", "35")])
+    assert SqliteSessionStore(path).get("s")["sections"] == [["BNSS", "35"]]
+
+
+@pytest.mark.parametrize("make_store", [
+    MemorySessionStore,
+    lambda: SqliteSessionStore(":memory:"),
+])
+def test_session_size_is_counted_in_utf8_bytes(make_store):
+    store = make_store()
+    answer = "धारा 303 के तहत चोरी"
+    store.record("s", "q", answer)
+    data = json.dumps(store.get("s"), ensure_ascii=False)
+    assert store.stats()["bytes"] == len(data.encode("utf-8")) > len(data)
+
+
+def test_expired_sessions_are_dropped():
+    store = MemorySessionStore(ttl=-1)
+    store.record("s", "q", "a")
+    assert store.get("s") is None